@@ -0,0 +1,237 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import gzip
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import Blueprint, current_app, request, abort
+
+from cache import cache
+from pagination import paginate
+from queries import venue_listing_query, artist_listing_query, show_listing_query, \
+    VENUE_LISTING_ORDER, ARTIST_LISTING_ORDER, SHOW_LISTING_ORDER, \
+    next_venue_show_at, venue_next_show_at, artist_next_show_at, \
+    venue_detail, venue_genres, venue_shows, artist_detail, artist_genres, artist_shows
+from search import search_venues_by_name, search_artists_by_name
+from bookings import venue_free_slots
+from areas import area_facets
+from serializers import row_to_dict, rows_to_dicts, split_shows
+from database import replica_reads
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+#----------------------------------------------------------------------------#
+# Encoding.
+#----------------------------------------------------------------------------#
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    def dumps(data):
+        return orjson.dumps(data, default=_default)
+else:
+    import json
+
+    def dumps(data):
+        return json.dumps(data, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200):
+    return current_app.response_class(dumps(data), status=status, mimetype='application/json')
+
+
+def _negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compressed(view):
+    # tag the response with an ETag of its body (answering If-None-Match with
+    # 304) and compress it with brotli or gzip when the client accepts them.
+    # Applied outside of cache.cached so cached bodies stay uncompressed
+    @wraps(view)
+    def wrapper(**kwargs):
+        response = current_app.make_response(current_app.ensure_sync(view)(**kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+
+        body = response.get_data()
+        encoding = _negotiate_encoding() if len(body) >= current_app.config['API_COMPRESS_MIN_SIZE'] else None
+        response.vary.add('Accept-Encoding')
+
+        # every encoding is its own representation with its own tag
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        response.set_etag(f'{etag}-{encoding}' if encoding else etag)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+        if encoding == 'br':
+            response.set_data(brotli.compress(body, quality=current_app.config['API_BROTLI_QUALITY']))
+        elif encoding == 'gzip':
+            response.set_data(gzip.compress(body, compresslevel=current_app.config['API_GZIP_LEVEL']))
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    return wrapper
+
+
+def page_response(page, items):
+    return json_response({
+        'data': items,
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+    })
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return json_response({'error': error.name}, status=error.code)
+
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+@api.route('/venues')
+@replica_reads
+@compressed
+@cache.cached('venues', expires_at=next_venue_show_at)
+def venues():
+    query = venue_listing_query(request.args.get('genre'), request.args.get('state'), request.args.get('city'))
+    page = paginate(query, VENUE_LISTING_ORDER, request.args.get('cursor'))
+    return page_response(page, rows_to_dicts(page.items))
+
+
+@api.route('/venues/areas')
+@replica_reads
+@compressed
+@cache.cached('venues')
+def venue_facets():
+    # venue counts per state and city, of one state with ?state=
+    return json_response({'data': area_facets(request.args.get('state'))})
+
+
+@api.route('/venues/search')
+@replica_reads
+@compressed
+def search_venues():
+    venues = search_venues_by_name(request.args.get('q', ''))
+    return json_response({'count': len(venues), 'data': rows_to_dicts(venues)})
+
+
+@api.route('/venues/<int:venue_id>')
+@replica_reads
+@compressed
+@cache.cached('venue:{venue_id}', expires_at=venue_next_show_at)
+def venue(venue_id):
+    venue = venue_detail(venue_id)
+    if venue is None:
+        abort(404)
+
+    return venue_response(venue, venue_genres(venue_id), venue_shows(venue_id))
+
+
+def venue_response(venue, genres, shows):
+    data = row_to_dict(venue)
+    data['genres'] = genres
+    data['past_shows'], data['upcoming_shows'] = split_shows(shows, datetime.now())
+    return json_response(data)
+
+# default and longest period of an availability query
+AVAILABILITY_PERIOD = timedelta(days=30)
+MAX_AVAILABILITY_PERIOD = timedelta(days=366)
+
+
+@api.route('/venues/<int:venue_id>/availability')
+@replica_reads
+@compressed
+def venue_availability(venue_id):
+    # free slots of the venue between ?start= and ?end= (ISO datetimes, the
+    # next 30 days by default) lasting at least ?min_duration= minutes
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else datetime.now()
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else start + AVAILABILITY_PERIOD
+    except ValueError:
+        abort(400)
+    min_duration = request.args.get('min_duration', type=int)
+    if not timedelta(0) < end - start <= MAX_AVAILABILITY_PERIOD:
+        abort(400)
+    if venue_detail(venue_id) is None:
+        abort(404)
+
+    slots = venue_free_slots(venue_id, start, end, timedelta(minutes=min_duration) if min_duration else None)
+    return json_response({
+        'data': [{'start_time': slot_start, 'end_time': slot_end} for slot_start, slot_end in slots],
+    })
+
+#----------------------------------------------------------------------------#
+# Artists.
+#----------------------------------------------------------------------------#
+
+@api.route('/artists')
+@replica_reads
+@compressed
+@cache.cached('artists')
+def artists():
+    page = paginate(artist_listing_query(request.args.get('genre')), ARTIST_LISTING_ORDER, request.args.get('cursor'))
+    return page_response(page, rows_to_dicts(page.items))
+
+
+@api.route('/artists/search')
+@replica_reads
+@compressed
+def search_artists():
+    artists = search_artists_by_name(request.args.get('q', ''))
+    return json_response({'count': len(artists), 'data': rows_to_dicts(artists)})
+
+
+@api.route('/artists/<int:artist_id>')
+@replica_reads
+@compressed
+@cache.cached('artist:{artist_id}', expires_at=artist_next_show_at)
+def artist(artist_id):
+    artist = artist_detail(artist_id)
+    if artist is None:
+        abort(404)
+
+    return artist_response(artist, artist_genres(artist_id), artist_shows(artist_id))
+
+
+def artist_response(artist, genres, shows):
+    data = row_to_dict(artist)
+    data['genres'] = genres
+    data['past_shows'], data['upcoming_shows'] = split_shows(shows, datetime.now())
+    return json_response(data)
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+@api.route('/shows')
+@replica_reads
+@compressed
+@cache.cached('shows')
+def shows():
+    page = paginate(show_listing_query(), SHOW_LISTING_ORDER, request.args.get('cursor'))
+    return page_response(page, rows_to_dicts(page.items))
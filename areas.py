@@ -0,0 +1,116 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from itertools import groupby
+from operator import itemgetter
+
+from sqlalchemy import func, select, insert, update, delete, tuple_
+
+from models import db, Venue, Area
+
+#----------------------------------------------------------------------------#
+# Areas.
+#----------------------------------------------------------------------------#
+
+# every venue points at the area of its city and state, and every area counts
+# its venues:
+#   * creating a venue enters its area, editing moves it, deleting leaves it
+#   * the bulk import recounts the areas of each chunk
+#   * rebuild_areas() recreates the areas from the venues (see the
+#     rebuild-areas command), e.g. after writes that bypass the handlers
+
+
+def _lookup(places):
+    rows = db.session.query(Area.id, Area.city, Area.state).filter(tuple_(Area.city, Area.state).in_(places))
+    return {(city, state): area_id for area_id, city, state in rows}
+
+
+def area_ids(places):
+    # map (city, state) pairs to their area ids, creating the areas seen for
+    # the first time
+    places = set(places)
+    if not places:
+        return dict()
+    ids = _lookup(places)
+    missing = places - ids.keys()
+    if missing:
+        db.session.execute(insert(Area), [{'city': city, 'state': state} for city, state in sorted(missing)])
+        ids.update(_lookup(missing))
+    return ids
+
+
+def _count_venues(area_id, difference):
+    db.session.execute(update(Area).where(Area.id == area_id).values(venue_count=Area.venue_count + difference))
+
+
+def enter_area(city, state):
+    # area id of a venue created in city, state
+    area_id = area_ids([(city, state)])[(city, state)]
+    _count_venues(area_id, 1)
+    return area_id
+
+
+def leave_area(area_id):
+    # a venue of the area is deleted
+    if area_id is not None:
+        _count_venues(area_id, -1)
+
+
+def move_venue(venue_id, city, state):
+    # area id of a venue edited to be in city, state. Call before the venue
+    # row is updated
+    previous_area_id = db.session.query(Venue.area_id).filter(Venue.id == venue_id).scalar()
+    area_id = area_ids([(city, state)])[(city, state)]
+    if area_id != previous_area_id:
+        leave_area(previous_area_id)
+        _count_venues(area_id, 1)
+    return area_id
+
+
+def recount_areas(*criteria):
+    # recompute the venue counts of every area (or of the given ones) with
+    # one UPDATE
+    venue_count = select(func.count(Venue.id)).where(Venue.area_id == Area.id).scalar_subquery()
+    statement = update(Area) \
+        .where(*criteria) \
+        .values(venue_count=venue_count) \
+        .execution_options(synchronize_session=False)
+    db.session.execute(statement)
+
+
+def rebuild_areas():
+    # recreate the areas from the cities and states of the venues, returning
+    # the number of areas. Venues pointing at the wrong area are moved (their
+    # updated_at is kept, the area is not exported) and empty areas deleted
+    area_ids(db.session.query(Venue.city, Venue.state).filter(Venue.city.isnot(None), Venue.state.isnot(None)).distinct())
+
+    area_id = select(Area.id).where(Area.city == Venue.city, Area.state == Venue.state).scalar_subquery()
+    statement = update(Venue) \
+        .where(Venue.area_id.is_distinct_from(area_id)) \
+        .values(area_id=area_id, updated_at=Venue.updated_at) \
+        .execution_options(synchronize_session=False)
+    db.session.execute(statement)
+
+    recount_areas()
+    db.session.execute(delete(Area).where(Area.venue_count == 0))
+    db.session.commit()
+    return db.session.query(func.count(Area.id)).scalar()
+
+#----------------------------------------------------------------------------#
+# Facets.
+#----------------------------------------------------------------------------#
+
+def area_facets(state=None):
+    # venue counts per state and per city of every area with venues (or of
+    # one state), read from the area rows alone:
+    #   [{'state', 'count', 'cities': [{'id', 'city', 'count'}]}]
+    query = db.session.query(Area).with_entities(Area.state, Area.city, Area.id, Area.venue_count) \
+        .filter(Area.venue_count > 0)
+    if state:
+        query = query.filter(Area.state == state)
+
+    facets = list()
+    for area_state, areas in groupby(query.order_by(Area.state, Area.city), key=itemgetter(0)):
+        cities = [{'id': area_id, 'city': city, 'count': venue_count} for _, city, area_id, venue_count in areas]
+        facets.append({'state': area_state, 'count': sum(city['count'] for city in cities), 'cities': cities})
+    return facets
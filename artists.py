@@ -0,0 +1,178 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, redirect, url_for, abort
+
+from models import db, Artist
+from queries import artist_listing_query, ARTIST_LISTING_ORDER, \
+    artist_next_show_at, artist_venue_ids, artist_detail, artist_genres, artist_shows
+from serializers import ARTIST_FORM_COLUMNS, ARTIST_REQUIRED_FIELDS, row_to_dict, split_shows, form_to_columns
+from pagination import paginate_listing, render_listing
+from cache import cache
+from search import search_artists_by_name
+from genres import set_genres
+from database import replica_reads
+
+blueprint = Blueprint('artists', __name__)
+
+#----------------------------------------------------------------------------#
+# Cache invalidation.
+#----------------------------------------------------------------------------#
+
+def invalidate_artist(artist_id):
+  # the artist page, the listings showing its name and the venues it plays at
+  cache.invalidate('artists', 'shows', f'artist:{artist_id}', *[f'venue:{venue_id}' for venue_id in artist_venue_ids(artist_id)])
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  Artists
+#  ----------------------------------------------------------------
+@blueprint.route('/artists')
+@replica_reads
+@cache.cached('artists')
+def artists():
+  # TODO: replace with real data returned from querying the database
+
+  # retrieve one page of entries in artist table, ?genre= narrows it down
+  page = paginate_listing(artist_listing_query(request.args.get('genre')), ARTIST_LISTING_ORDER)
+  data = ({'id': artist.id, 'name': artist.name, 'version': artist.version} for artist in page.items)
+
+  return render_listing('pages/artists.html', artists=data, page=page)
+
+@blueprint.route('/artists/search', methods=['POST'])
+@replica_reads
+def search_artists():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+
+  # parse search term and use it for a case-insensitive ranked name search
+  search_term = request.form.get('search_term', '')
+  artists_search_result = search_artists_by_name(search_term)
+
+  response = dict()
+  response['count'] = len(artists_search_result)
+  response['data'] = [{
+      'id': artist.id,
+      'name': artist.name,
+      'num_upcoming_shows': artist.upcoming_shows_count
+  } for artist in artists_search_result]
+
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+@blueprint.route('/artists/<int:artist_id>')
+@replica_reads
+@cache.cached('artist:{artist_id}', expires_at=artist_next_show_at)
+def show_artist(artist_id):
+    # shows the venue page with the given venue_id
+    # TODO: replace with real venue data from the venues table, using venue_id
+
+    # query artist table by input artist_id
+    artist = artist_detail(artist_id)
+    if artist is None:
+        abort(404)
+    return render_artist(artist, artist_genres(artist_id), artist_shows(artist_id))
+
+def render_artist(artist, genres, shows):
+    current_time = datetime.now()
+
+    # find past and upcoming shows of the artist in one pass over the show tiles
+    past_shows, upcoming_shows = split_shows(shows, current_time)
+
+    data = row_to_dict(artist)
+    data['genres'] = genres
+
+    data['past_shows'] = past_shows
+    data['past_shows_count'] = len(past_shows)
+
+    data['upcoming_shows'] = upcoming_shows
+    data['upcoming_shows_count'] = len(upcoming_shows)
+
+    return render_template('pages/show_artist.html', artist=data)
+
+#  Update
+#  ----------------------------------------------------------------
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  # populate form with fields from artist with ID <artist_id>
+  # (WTForms is imported by the first form page rather than at startup)
+  from forms import ArtistForm
+  form = ArtistForm()
+
+  artist = artist_detail(artist_id)
+  if artist is None:
+    abort(404)
+  artist = row_to_dict(artist)
+
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@blueprint.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+
+  # update existing record attributes with input values from submitted form
+  artist = form_to_columns(request.form, ARTIST_FORM_COLUMNS, ARTIST_REQUIRED_FIELDS)
+  record = db.session.get(Artist, artist_id)
+  if record is None:
+    abort(404)
+  try:
+      # changed on the loaded artist rather than with a bulk UPDATE, so the
+      # mapper events (the search index of search.py) see the new name
+      for name, value in artist.items():
+          setattr(record, name, value)
+      record.version = Artist.version + 1
+      set_genres(Artist, artist_id, request.form.getlist('genres'))
+      # commit ORM object changes to database
+      db.session.commit()
+      invalidate_artist(artist_id)
+  except Exception as error:
+      # rollback pending changes on error
+      db.session.rollback()
+
+
+  finally:
+    # close current session and parse submission message
+    db.session.close()
+
+  return redirect(url_for('.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@blueprint.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@blueprint.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+
+    # parse the entry of the artist table from the submitted form
+    data = form_to_columns(request.form, ARTIST_FORM_COLUMNS, ARTIST_REQUIRED_FIELDS)
+    try:
+        artist = Artist(**data)
+
+        db.session.add(artist)
+        db.session.flush()
+        set_genres(Artist, artist.id, request.form.getlist('genres'))
+        # commit ORM object changes to database
+        db.session.commit()
+        cache.invalidate('artists')
+    except Exception as error:
+        # rollback pending changes on error
+        db.session.rollback()
+
+    finally:
+      # close current session and parse submission message
+      db.session.close()
+
+    return render_template('pages/home.html')
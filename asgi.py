@@ -0,0 +1,42 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import asyncio
+import contextvars
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+
+#----------------------------------------------------------------------------#
+# ASGI application.
+#----------------------------------------------------------------------------#
+
+# serve with an ASGI server (asgiref and e.g. uvicorn installed):
+#   ASYNC_VIEWS=1 uvicorn asgi:application --workers 4
+# Requests run on threads of their own, and the async views (ASYNC_VIEWS)
+# await their queries from the server loop
+
+
+class ThreadedWsgiToAsgi:
+    # WsgiToAsgi runs every request on one thread shared by the process by
+    # default, which would serve the requests of a worker one at a time. A
+    # ThreadSensitiveContext per request gives each request a thread of its
+    # own. Each request also starts from an empty context: asgiref's
+    # executor context variables can leak from a finished request into the
+    # server's context, and the next request then submits to an executor
+    # that has shut down ("CurrentThreadExecutor already quit or is broken")
+
+    def __init__(self, wsgi_application):
+        self.application = WsgiToAsgi(wsgi_application)
+
+    async def __call__(self, scope, receive, send):
+        await contextvars.Context().run(asyncio.ensure_future, self._run(scope, receive, send))
+
+    async def _run(self, scope, receive, send):
+        async with ThreadSensitiveContext():
+            await self.application(scope, receive, send)
+
+
+application = ThreadedWsgiToAsgi(create_app())
@@ -0,0 +1,131 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import asyncio
+from threading import Lock, Thread
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import instrument_pool
+
+#----------------------------------------------------------------------------#
+# Engine.
+#----------------------------------------------------------------------------#
+
+# async drivers replacing the sync ones of SQLALCHEMY_DATABASE_URI
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(config):
+    # ASYNC_DATABASE_URI, or SQLALCHEMY_DATABASE_URI with its async driver
+    if config['ASYNC_DATABASE_URI']:
+        return make_url(config['ASYNC_DATABASE_URI'])
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver for {backend} databases, set ASYNC_DATABASE_URL.')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def async_engine_options(config, url):
+    # create_async_engine() arguments of the DB_* settings, as engine_options()
+    # in database.py builds them for the sync engine
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    if config['DB_PGBOUNCER']:
+        options['poolclass'] = NullPool
+    else:
+        options.update(
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+
+    if url.get_driver_name() == 'asyncpg':
+        connect_args = dict()
+        if config['DB_STATEMENT_TIMEOUT'] and not config['DB_PGBOUNCER']:
+            connect_args['server_settings'] = {'statement_timeout': str(config['DB_STATEMENT_TIMEOUT'])}
+        if config['DB_PGBOUNCER']:
+            # prepared statements don't survive switching server connections
+            connect_args['statement_cache_size'] = 0
+            connect_args['prepared_statement_cache_size'] = 0
+        if connect_args:
+            options['connect_args'] = connect_args
+
+    return options
+
+#----------------------------------------------------------------------------#
+# Async database.
+#----------------------------------------------------------------------------#
+
+class AsyncDatabase:
+    # async engine of the async views (ASYNC_VIEWS). The engine and its pool
+    # live on an event loop thread of their own: views await their queries
+    # from whichever loop runs them (a loop per request under a WSGI server,
+    # the server loop under asgi.py), while pooled connections always stay on
+    # the loop that opened them. Every query runs in a session of its own, so
+    # the queries of a view can be gathered and run concurrently
+
+    def __init__(self):
+        self.engine = None
+        self.sessions = None
+        self.loop = None
+        self.lock = Lock()
+
+    def init_app(self, app):
+        config = app.config
+        url = async_database_url(config)
+        self.engine = create_async_engine(url, **async_engine_options(config, url))
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        instrument_pool(self.engine.sync_engine)
+
+        statement_timeout = config['DB_STATEMENT_TIMEOUT']
+        if config['DB_PGBOUNCER'] and statement_timeout and url.get_backend_name() == 'postgresql':
+            # PgBouncer rejects startup options, see database.init_database()
+            @event.listens_for(self.engine.sync_engine, 'begin')
+            def _set_statement_timeout(connection):
+                connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(statement_timeout)}')
+
+        app.extensions['async_database'] = self
+
+    def _event_loop(self):
+        if self.loop is None:
+            with self.lock:
+                if self.loop is None:
+                    loop = asyncio.new_event_loop()
+                    Thread(target=loop.run_forever, name='async-database', daemon=True).start()
+                    self.loop = loop
+        return self.loop
+
+    async def _in_session(self, function, statement):
+        async with self.sessions() as session:
+            return function(await session.execute(statement))
+
+    def run(self, function, query):
+        # awaitable of function(result) of the query (a Query or a statement),
+        # executed on the loop of the engine
+        statement = getattr(query, 'statement', query)
+        future = asyncio.run_coroutine_threadsafe(self._in_session(function, statement), self._event_loop())
+        return asyncio.wrap_future(future)
+
+    def first(self, query):
+        return self.run(lambda result: result.first(), query)
+
+    def all(self, query):
+        return self.run(lambda result: result.all(), query)
+
+    def scalars(self, query):
+        return self.run(lambda result: result.scalars().all(), query)
+
+
+async_db = AsyncDatabase()
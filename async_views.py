@@ -0,0 +1,77 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import asyncio
+
+from flask import abort
+
+from cache import cache
+from queries import venue_next_show_at, artist_next_show_at, venue_shows, artist_shows, \
+    venue_detail_query, venue_genres_query, artist_detail_query, artist_genres_query
+from async_database import async_db
+from venues import render_venue
+from artists import render_artist
+from api import compressed, venue_response, artist_response
+
+#----------------------------------------------------------------------------#
+# Async views.
+#----------------------------------------------------------------------------#
+
+# the detail pages and their API endpoints in async mode (ASYNC_VIEWS), reading
+# their rows concurrently from the async engine. Only imported by create_app()
+# in async mode, so the other workers never load asyncio and the async engine
+
+
+@cache.cached('venue:{venue_id}', expires_at=venue_next_show_at)
+async def show_venue(venue_id):
+    # reading the venue, its genres and its shows concurrently
+    venue, genres, shows = await asyncio.gather(
+        async_db.first(venue_detail_query(venue_id)),
+        async_db.scalars(venue_genres_query(venue_id)),
+        async_db.all(venue_shows(venue_id)))
+    if venue is None:
+        abort(404)
+    return render_venue(venue, genres, shows)
+
+
+@cache.cached('artist:{artist_id}', expires_at=artist_next_show_at)
+async def show_artist(artist_id):
+    artist, genres, shows = await asyncio.gather(
+        async_db.first(artist_detail_query(artist_id)),
+        async_db.scalars(artist_genres_query(artist_id)),
+        async_db.all(artist_shows(artist_id)))
+    if artist is None:
+        abort(404)
+    return render_artist(artist, genres, shows)
+
+
+@compressed
+@cache.cached('venue:{venue_id}', expires_at=venue_next_show_at)
+async def venue(venue_id):
+    venue, genres, shows = await asyncio.gather(
+        async_db.first(venue_detail_query(venue_id)),
+        async_db.scalars(venue_genres_query(venue_id)),
+        async_db.all(venue_shows(venue_id)))
+    if venue is None:
+        abort(404)
+    return venue_response(venue, genres, shows)
+
+
+@compressed
+@cache.cached('artist:{artist_id}', expires_at=artist_next_show_at)
+async def artist(artist_id):
+    artist, genres, shows = await asyncio.gather(
+        async_db.first(artist_detail_query(artist_id)),
+        async_db.scalars(artist_genres_query(artist_id)),
+        async_db.all(artist_shows(artist_id)))
+    if artist is None:
+        abort(404)
+    return artist_response(artist, genres, shows)
+
+# endpoints served by the async views, see create_app()
+ASYNC_VIEWS = {
+    'venues.show_venue': show_venue,
+    'artists.show_artist': show_artist,
+    'api.venue': venue,
+    'api.artist': artist,
+}
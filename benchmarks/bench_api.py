@@ -0,0 +1,88 @@
+#----------------------------------------------------------------------------#
+# JSON API benchmark.
+#----------------------------------------------------------------------------#
+
+# requests per second of the HTML pages and of their /api/v1 counterparts on
+# the same generated data, through the test client of one worker with the
+# page cache off, from a fresh sqlite database unless DATABASE_URL is set.
+# "304" repeats the API request with the ETag of its first response:
+#
+#   python benchmarks/bench_api.py [--rows 1000] [--seconds 3]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from app import create_app
+from models import db, Venue, Artist, Show
+
+# (HTML page, API endpoint) pairs
+PATHS = (
+    ('/venues', '/api/v1/venues'),
+    ('/artists', '/api/v1/artists'),
+    ('/shows', '/api/v1/shows'),
+    ('/venues/1', '/api/v1/venues/1'),
+    ('/artists/1', '/api/v1/artists/1'),
+)
+
+
+def seed(rows):
+    # venues and artists in a few areas, each playing once a day
+    start = datetime(2030, 1, 1, 20)
+    db.session.execute(insert(Venue), [{'name': f'Venue {number}', 'city': f'City {number % 20}', 'state': 'CA',
+                                        'address': f'{number} Folsom Street', 'phone': '326-123-5000'}
+                                       for number in range(rows)])
+    db.session.execute(insert(Artist), [{'name': f'Artist {number}', 'city': 'San Francisco', 'state': 'CA'}
+                                        for number in range(rows)])
+    db.session.execute(insert(Show), [{'venue_id': number % 100 + 1, 'artist_id': number % 100 + 1,
+                                       'start_time': start + timedelta(days=number // 100),
+                                       'end_time': start + timedelta(days=number // 100, hours=2)}
+                                      for number in range(rows)])
+    db.session.commit()
+
+
+def requests_per_second(client, path, seconds, headers=None):
+    expected = 304 if headers else 200
+    requests = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = client.get(path, headers=headers)
+        assert response.status_code == expected, (path, response.status_code)
+        requests += 1
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seconds', type=float, default=3)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the app logs to the error.log of the working directory
+        os.chdir(directory)
+        uri = os.environ.get('DATABASE_URL') or f'sqlite:///{directory}/bench.db'
+        app = create_app(SQLALCHEMY_DATABASE_URI=uri, SECRET_KEY='bench', CACHE_TYPE='null', QUERY_PROFILE_SAMPLE_RATE=0)
+        with app.app_context():
+            db.create_all()
+            seed(arguments.rows)
+        client = app.test_client()
+
+        print(f'{"path":<12} {"html req/s":>11} {"api req/s":>10} {"ratio":>6} {"api 304 req/s":>14}')
+        for page, endpoint in PATHS:
+            etag = client.get(endpoint).headers['ETag']
+            html = requests_per_second(client, page, arguments.seconds)
+            json = requests_per_second(client, endpoint, arguments.seconds)
+            not_modified = requests_per_second(client, endpoint, arguments.seconds, {'If-None-Match': etag})
+            print(f'{page:<12} {html:>11.0f} {json:>10.0f} {json / html:>5.1f}x {not_modified:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#----------------------------------------------------------------------------#
+# Async mode benchmark.
+#----------------------------------------------------------------------------#
+
+# throughput and p50/p99 latency of /api/v1/venues/<id> under an ASGI server
+# (uvicorn serving asgi.py, one worker) with the sync views and with the
+# async views (ASYNC_VIEWS), with concurrent httpx clients requesting for a
+# fixed time. The page cache is off, the database a fresh sqlite one unless
+# DATABASE_URL is set:
+#
+#   python benchmarks/bench_async.py [--clients 500] [--seconds 15] [--port 8765]
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+from sqlalchemy import insert
+
+from app import create_app
+from models import db, Venue, Artist, Show
+
+VENUES = 5
+
+
+def seed():
+    # a few venues with a genre-less artist playing each of them weekly
+    start = datetime(2030, 1, 1, 20)
+    db.session.execute(insert(Venue), [{'name': f'Venue {number}', 'city': 'San Francisco', 'state': 'CA'}
+                                       for number in range(VENUES)])
+    db.session.execute(insert(Artist), [{'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA'}])
+    db.session.execute(insert(Show), [{'venue_id': number % VENUES + 1, 'artist_id': 1,
+                                       'start_time': start + timedelta(days=number),
+                                       'end_time': start + timedelta(days=number, hours=2)}
+                                      for number in range(100)])
+    db.session.commit()
+
+
+def wait_for(port, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'uvicorn exited with {server.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('uvicorn did not start')
+
+
+async def client_loop(client, latencies, stop):
+    number = 0
+    while time.monotonic() < stop:
+        started = time.perf_counter()
+        response = await client.get(f'/api/v1/venues/{number % VENUES + 1}')
+        assert response.status_code == 200, response.status_code
+        latencies.append(time.perf_counter() - started)
+        number += 1
+
+
+async def load(url, clients, seconds):
+    latencies = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        stop = time.monotonic() + seconds
+        await asyncio.gather(*(client_loop(client, latencies, stop) for _ in range(clients)))
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--port', type=int, default=8765)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the app logs to the error.log of the working directory
+        os.chdir(directory)
+        uri = os.environ.get('DATABASE_URL') or f'sqlite:///{directory}/bench.db'
+        app = create_app(SQLALCHEMY_DATABASE_URI=uri, SECRET_KEY='bench', CACHE_TYPE='null')
+        with app.app_context():
+            db.create_all()
+            seed()
+
+        for label, async_views in (('sync', ''), ('async', '1')):
+            environment = {**os.environ, 'DATABASE_URL': uri, 'SECRET_KEY': 'bench', 'CACHE_TYPE': 'null',
+                           'QUERY_PROFILE_SAMPLE_RATE': '0', 'ASYNC_VIEWS': async_views}
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'uvicorn', 'asgi:application', '--app-dir', ROOT,
+                 '--port', str(arguments.port), '--log-level', 'warning'],
+                env=environment, cwd=directory)
+            try:
+                wait_for(arguments.port, server)
+                latencies = asyncio.run(load(f'http://127.0.0.1:{arguments.port}', arguments.clients, arguments.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+            print(f'{label:<6} {arguments.clients} clients  {len(latencies) / arguments.seconds:7.0f} req/s  '
+                  f'p50 {latencies[len(latencies) // 2] * 1000:8.1f} ms  '
+                  f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#----------------------------------------------------------------------------#
+# Datetime filter benchmark.
+#----------------------------------------------------------------------------#
+
+# milliseconds to render pages/shows.html with generated show tiles, best of
+# a few runs, with the datetime filter of formatting.py (few and all distinct
+# start times), with the filter of the app before it (dateutil and babel on
+# every tile, given strings) and with a filter doing nothing, which is the
+# cost of the rest of the template. Fragment caching is off:
+#
+#   python benchmarks/bench_formatting.py [--rows 10000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template
+
+from app import create_app
+from formatting import datetime_formatter
+
+
+def previous_format_datetime(value, format='medium'):
+    # the filter of app.py before formatting.py
+    import babel.dates
+    import dateutil.parser
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format)
+
+
+def show_tiles(rows, distinct):
+    start = datetime(2030, 1, 1, 20)
+    for number in range(rows):
+        yield {'id': number, 'artist_id': 1, 'venue_id': 1, 'artist_name': 'Guns N Petals',
+               'venue_name': 'The Musical Hop', 'artist_version': 1, 'venue_version': 1,
+               'artist_image_link': 'https://images.example.com/artist.jpg',
+               'start_time': start + timedelta(hours=number % distinct)}
+
+
+def measure(label, app, shows, filter, runs=3):
+    app.jinja_env.filters['datetime'] = filter
+    timings = []
+    for _ in range(runs):
+        # an empty cache of formatted datetimes on every run
+        datetime_formatter._format.cache_clear()
+        with app.test_request_context('/shows'):
+            app.preprocess_request()
+            started = time.perf_counter()
+            render_template('pages/shows.html', shows=shows, page=None)
+            timings.append(time.perf_counter() - started)
+    print(f'{label:<22} {len(shows):>6} tiles  {min(timings) * 1000:8.0f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    arguments = parser.parse_args()
+    rows = arguments.rows
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the app logs to the error.log of the working directory
+        os.chdir(directory)
+        app = create_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{directory}/bench.db', SECRET_KEY='bench',
+                         CACHE_TYPE='null', QUERY_PROFILE_SAMPLE_RATE=0, FRAGMENT_CACHE_SIZE=0)
+
+        shows = list(show_tiles(rows, rows))
+        measure('before', app, shows, lambda value, format='medium': previous_format_datetime(str(value), format))
+        measure('500 start times', app, list(show_tiles(rows, 500)), datetime_formatter.format)
+        measure(f'{rows} start times', app, shows, datetime_formatter.format)
+        measure('no-op filter', app, shows, lambda value, format='medium': '')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#----------------------------------------------------------------------------#
+# Genre filter benchmark.
+#----------------------------------------------------------------------------#
+
+# milliseconds to read the first /venues page of one genre, in one state and
+# in any, and to count every such venue, from generated venues with two
+# common genres each and a rare genre on one venue in RARE_EVERY, for a
+# common and the rare genre. The venue_genre links (genres.py) are compared with the
+# stringified genre list column of the schema before migration cb837c1bc0b3,
+# which is matched with LIKE. Both tables have the listing indexes of the
+# venues page. A fresh sqlite database unless DATABASE_URL is set:
+#
+#   python benchmarks/bench_genres.py [--rows 1000000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, Integer, String, Table, Index, func, insert, select
+
+from app import create_app
+from models import db, Venue, Genre, venue_genre
+from choices import STATES, GENRES
+from pagination import paginate
+from queries import VENUE_LISTING_ORDER, venue_listing_query
+
+GENRE, RARE_GENRE, STATE = 'Jazz', 'Other', 'CA'
+RARE_EVERY = 10000
+
+# the venue columns the filter reads, with genres stored as before the migration
+legacy_venue = Table(
+    'legacy_venue', db.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String),
+    Column('city', String(120)),
+    Column('state', String(120)),
+    Column('genres', String(120)),
+    Index('ix_legacy_venue_city_state_name_id', 'city', 'state', 'name', 'id'),
+    Index('ix_legacy_venue_state_city_name_id', 'state', 'city', 'name', 'id'),
+)
+
+
+def seed(rows):
+    genres = GENRES.values
+    db.session.execute(insert(Genre), [{'name': name} for name in genres])
+    common = [name for name in genres if name != RARE_GENRE]
+    for first in range(0, rows, 50000):
+        numbers = range(first, min(first + 50000, rows))
+        venues = [{'id': number + 1, 'name': f'Venue {number}', 'city': f'City {number % 97}',
+                   'state': STATES.values[number % len(STATES.values)]} for number in numbers]
+        # two common genres per venue, and the rare one now and then
+        pairs = [(common[number % len(common)], common[number * 7 % len(common)])
+                 + ((RARE_GENRE,) if number % RARE_EVERY == 0 else ()) for number in numbers]
+        db.session.execute(insert(Venue), venues)
+        db.session.execute(insert(venue_genre), [
+            {'venue_id': venue['id'], 'genre_id': genres.index(name) + 1}
+            for venue, pair in zip(venues, pairs) for name in set(pair)])
+        db.session.execute(insert(legacy_venue), [
+            {**venue, 'genres': '{' + ','.join(f'"{name}"' for name in pair) + '}'}
+            for venue, pair in zip(venues, pairs)])
+    db.session.commit()
+
+
+def measure(label, function, runs=5):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    print(f'{label:<22} {min(timings) * 1000:9.1f} ms  ({result})')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the app logs to the error.log of the working directory
+        os.chdir(directory)
+        uri = os.environ.get('DATABASE_URL') or f'sqlite:///{directory}/bench.db'
+        app = create_app(SQLALCHEMY_DATABASE_URI=uri, SECRET_KEY='bench', CACHE_TYPE='null', QUERY_PROFILE_SAMPLE_RATE=0)
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            seed(arguments.rows)
+            print(f'{arguments.rows} venues seeded in {time.perf_counter() - started:.0f} s')
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+
+            for genre, state in ((genre, state) for genre in (GENRE, RARE_GENRE) for state in (STATE, None)):
+                legacy = select(legacy_venue.c.id, legacy_venue.c.name) \
+                    .where(legacy_venue.c.genres.like(f'%"{genre}"%'))
+                if state:
+                    legacy = legacy.where(legacy_venue.c.state == state)
+                legacy_order = [legacy_venue.c[column.key] for column in VENUE_LISTING_ORDER]
+                linked = venue_listing_query(genre, state)
+
+                print(f'genre={genre} state={state or "any"}')
+                measure('genre links, page', lambda: len(paginate(linked, VENUE_LISTING_ORDER, size=50).items))
+                measure('LIKE column, page', lambda: len(db.session.execute(legacy.order_by(*legacy_order).limit(51)).all()))
+                measure('genre links, count', lambda: linked.count())
+                measure('LIKE column, count', lambda: db.session.execute(
+                    select(func.count()).select_from(legacy.subquery())).scalar())
+
+
+if __name__ == '__main__':
+    main()
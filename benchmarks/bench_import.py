@@ -0,0 +1,92 @@
+#----------------------------------------------------------------------------#
+# Bulk import benchmark.
+#----------------------------------------------------------------------------#
+
+# rows per second of the bulk import (importer.py) of generated venues,
+# artists and shows as ndjson, into a fresh sqlite database unless
+# DATABASE_URL is set. "validate" only runs the per-row checks, "import" the
+# whole pipeline from the file to the committed chunks:
+#
+#   python benchmarks/bench_import.py [--rows 50000]
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db
+from importer import importer_for, read_records
+
+
+def venue_records(count):
+    for number in range(count):
+        yield {'name': f'Venue {number}', 'city': f'City {number % 200}', 'state': 'CA',
+               'address': f'{number} Folsom Street', 'phone': '326-123-5000',
+               'image_link': 'https://images.example.com/venue.jpg',
+               'facebook_link': 'https://www.facebook.com/venue', 'genres': 'Jazz,Blues'}
+
+
+def artist_records(count):
+    for number in range(count):
+        yield {'name': f'Artist {number}', 'city': 'San Francisco', 'state': 'CA', 'phone': '326-123-5000',
+               'image_link': 'https://images.example.com/artist.jpg',
+               'facebook_link': 'https://www.facebook.com/artist', 'genres': ['Rock n Roll']}
+
+
+def show_records(count, venues, artists):
+    # every venue and artist plays once a day, so no show overlaps another
+    start = datetime(2030, 1, 1, 20)
+    for number in range(count):
+        yield {'venue_id': number % venues + 1, 'artist_id': number % artists + 1,
+               'start_time': (start + timedelta(days=number // max(venues, artists))).isoformat(' '),
+               'duration': 120}
+
+
+def ndjson(records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def measure(label, rows, function):
+    started = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - started
+    print(f'{label:<18} {rows:>8} rows  {seconds:7.2f} s  {rows / seconds:>9.0f} rows/s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50000)
+    arguments = parser.parse_args()
+    rows = arguments.rows
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the app logs to the error.log of the working directory
+        os.chdir(directory)
+        uri = os.environ.get('DATABASE_URL') or f'sqlite:///{directory}/bench.db'
+        app = create_app(SQLALCHEMY_DATABASE_URI=uri, SECRET_KEY='bench', CACHE_TYPE='null', QUERY_PROFILE_SAMPLE_RATE=0)
+        with app.app_context():
+            db.create_all()
+            files = {
+                'venues': ndjson(venue_records(rows)),
+                'artists': ndjson(artist_records(rows)),
+                'shows': ndjson(show_records(rows, rows, rows)),
+            }
+            for kind, text in files.items():
+                importer = importer_for(kind)
+                records = list(read_records(io.StringIO(text), 'ndjson'))
+                measure(f'{kind} validate', rows, lambda: [importer.validate(record) for record in records])
+                report = measure(f'{kind} import', rows, lambda: importer.run(
+                    read_records(io.StringIO(text), 'ndjson'), app.config['IMPORT_CHUNK_SIZE']))
+                assert report['imported'] == rows, report['errors'][:3]
+
+
+if __name__ == '__main__':
+    main()
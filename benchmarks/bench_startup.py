@@ -0,0 +1,89 @@
+#----------------------------------------------------------------------------#
+# Worker startup benchmark.
+#----------------------------------------------------------------------------#
+
+# how long a fresh worker process takes to import app.py and create the app,
+# and then to serve its first /venues and /venues/1 requests, without the
+# template bytecode cache, with the templates compiled into it (as by the
+# compile-templates command) and loaded lazily, and compiled and preloaded
+# (TEMPLATE_PRELOAD). Each configuration starts --runs processes on a fresh
+# sqlite database with the page cache off:
+#
+#   python benchmarks/bench_startup.py [--runs 5]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# run in the fresh process, prints the timings in milliseconds as json
+WORKER = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from app import create_app
+imported = time.perf_counter()
+app = create_app(**{settings!r})
+created = time.perf_counter()
+client = app.test_client()
+timings = {{'import': imported - started, 'create_app': created - imported}}
+for path in ('/venues', '/venues/1'):
+    requested = time.perf_counter()
+    assert client.get(path).status_code == 200, path
+    timings[path] = time.perf_counter() - requested
+print(json.dumps({{name: seconds * 1000 for name, seconds in timings.items()}}))
+'''
+
+
+def run_worker(directory, settings):
+    script = WORKER.format(root=ROOT, settings=settings)
+    output = subprocess.run([sys.executable, '-c', script], cwd=directory, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the workers log to the error.log of the working directory
+        os.chdir(directory)
+        sys.path.insert(0, ROOT)
+        from app import create_app
+        from models import db, Venue
+        from templating import compile_templates
+
+        cache_directory = os.path.join(directory, 'templates')
+        settings = dict(SQLALCHEMY_DATABASE_URI=f'sqlite:///{directory}/bench.db', SECRET_KEY='bench',
+                        CACHE_TYPE='null', QUERY_PROFILE_SAMPLE_RATE=0)
+        app = create_app(TEMPLATE_CACHE_DIR=cache_directory, TEMPLATE_PRELOAD=False, **settings)
+        with app.app_context():
+            db.create_all()
+            db.session.add(Venue(name='The Musical Hop', city='San Francisco', state='CA'))
+            db.session.commit()
+
+        configurations = (
+            ('no bytecode cache', dict(TEMPLATE_CACHE_DIR=None, TEMPLATE_PRELOAD=False)),
+            ('compiled, lazy load', dict(TEMPLATE_CACHE_DIR=cache_directory, TEMPLATE_PRELOAD=False)),
+            ('compiled, preloaded', dict(TEMPLATE_CACHE_DIR=cache_directory, TEMPLATE_PRELOAD=True)),
+        )
+        compile_templates(app)
+
+        print(f'{"":<20} {"import app":>14} {"create_app()":>14} {"first /venues":>15} {"first /venues/1":>17}')
+        for label, configuration in configurations:
+            runs = [run_worker(directory, {**settings, **configuration}) for _ in range(arguments.runs)]
+            columns = []
+            for name in ('import', 'create_app', '/venues', '/venues/1'):
+                timings = sorted(run[name] for run in runs)
+                columns.append(f'{timings[0]:.0f}-{timings[-1]:.0f} ms')
+            print(f'{label:<20} {columns[0]:>14} {columns[1]:>14} {columns[2]:>15} {columns[3]:>17}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#----------------------------------------------------------------------------#
+# Streamed listing benchmark.
+#----------------------------------------------------------------------------#
+
+# time to first byte, total time and peak Python memory (tracemalloc) of one
+# /shows page holding every generated show, rendered buffered and streamed
+# (STREAM_LISTINGS), from a fresh sqlite database unless DATABASE_URL is set:
+#
+#   python benchmarks/bench_streaming.py [--rows 100000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from app import create_app
+from models import db, Venue, Artist, Show
+
+
+def seed(rows):
+    # a hundred venues and artists, each playing once a day
+    entities = 100
+    start = datetime(2030, 1, 1, 20)
+    db.session.execute(insert(Venue), [{'name': f'Venue {number}', 'city': 'San Francisco', 'state': 'CA'}
+                                       for number in range(entities)])
+    db.session.execute(insert(Artist), [{'name': f'Artist {number}', 'city': 'San Francisco', 'state': 'CA'}
+                                        for number in range(entities)])
+    db.session.execute(insert(Show), [{'venue_id': number % entities + 1, 'artist_id': number % entities + 1,
+                                       'start_time': start + timedelta(days=number // entities),
+                                       'end_time': start + timedelta(days=number // entities, hours=2)}
+                                      for number in range(rows)])
+    db.session.commit()
+
+
+def measure(label, client, rows):
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(f'/shows?per_page={rows}', buffered=False)
+    chunks = iter(response.response)
+    size = len(next(chunks))
+    first_byte = time.perf_counter() - started
+    size += sum(len(chunk) for chunk in chunks)
+    response.close()
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{label:<10} {rows:>8} shows  ttfb {first_byte * 1000:8.1f} ms  total {seconds:6.2f} s  '
+          f'peak {peak / 2 ** 20:7.1f} MiB  {size / 2 ** 20:6.1f} MiB of html')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    arguments = parser.parse_args()
+    rows = arguments.rows
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the app logs to the error.log of the working directory
+        os.chdir(directory)
+        uri = os.environ.get('DATABASE_URL') or f'sqlite:///{directory}/bench.db'
+        settings = dict(SQLALCHEMY_DATABASE_URI=uri, SECRET_KEY='bench', CACHE_TYPE='null', QUERY_PROFILE_SAMPLE_RATE=0,
+                        MAX_PAGE_SIZE=rows, MAX_STREAMED_PAGE_SIZE=rows)
+        app = create_app(**settings)
+        with app.app_context():
+            db.create_all()
+            seed(rows)
+
+        for label, stream in (('buffered', False), ('streamed', True)):
+            app = create_app(STREAM_LISTINGS=stream, **settings)
+            client = app.test_client()
+            # compile the template and open the connection first
+            client.get('/shows?per_page=1')
+            measure(label, client, rows)
+
+
+if __name__ == '__main__':
+    main()
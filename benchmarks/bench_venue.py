@@ -0,0 +1,122 @@
+#----------------------------------------------------------------------------#
+# Venue page benchmark.
+#----------------------------------------------------------------------------#
+
+# milliseconds to build the template data of the /venues/<id> page of a venue
+# with generated shows, half of them past, and to also render it, best of a
+# few runs. The show_venue of app.py before serializers.py (every attribute of
+# every row through _asdict) is compared with the one of venues.py. The page
+# and fragment caches are off:
+#
+#   python benchmarks/bench_venue.py [--shows 10000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template
+from sqlalchemy import inspect, insert
+
+from app import create_app
+from models import db, Venue, Artist, Show
+from queries import venue_detail, venue_genres, venue_shows
+from serializers import row_to_dict, split_shows
+from venues import render_venue
+
+
+def seed(shows):
+    now = datetime.now()
+    db.session.execute(insert(Venue), [{'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA',
+                                        'address': '1015 Folsom Street'}])
+    db.session.execute(insert(Artist), [{'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA',
+                                         'image_link': 'https://images.example.com/artist.jpg'}])
+    db.session.execute(insert(Show), [{'venue_id': 1, 'artist_id': 1,
+                                       'start_time': now + timedelta(hours=number - shows // 2)}
+                                      for number in range(shows)])
+    db.session.commit()
+
+
+def previous_show_venue(venue_id, render):
+    # the show_venue of app.py before serializers.py
+    venue_table_attributes = inspect(Venue).c
+    # the columns rather than their names, which SQLAlchemy 2 no longer takes
+    attribute_list = list(venue_table_attributes)
+    venue = db.session.query(Venue).with_entities(*attribute_list).filter(Venue.id == venue_id).all()
+    current_time = datetime.now()
+    shows_query = db.session.query(Show).join(Artist) \
+        .with_entities(Show.artist_id, Artist.name, Artist.image_link, Show.start_time) \
+        .filter(Show.venue_id == venue_id).all()
+    past_shows = list()
+    upcoming_shows = list()
+    shows_query_attributes = shows_query[0]._asdict().keys()
+    for show in shows_query:
+        shows_data = dict()
+        for attribute in shows_query_attributes:
+            if attribute in ['name', 'image_link']:
+                shows_data['artist_' + attribute] = show._asdict()[attribute]
+            else:
+                shows_data[attribute] = show._asdict()[attribute]
+        if show.start_time > current_time:
+            upcoming_shows.append(shows_data)
+        else:
+            past_shows.append(shows_data)
+    data = venue[0]._asdict()
+    # genres are linked rows since migration cb837c1bc0b3
+    data['genres'] = venue_genres(venue_id)
+    data['past_shows'] = past_shows
+    data['past_shows_count'] = len(past_shows)
+    data['upcoming_shows'] = upcoming_shows
+    data['upcoming_shows_count'] = len(upcoming_shows)
+    return render_template('pages/show_venue.html', venue=data) if render else data
+
+
+def current_show_venue(venue_id, render):
+    if render:
+        return render_venue(venue_detail(venue_id), venue_genres(venue_id), venue_shows(venue_id))
+    # the data of render_venue, without its render_template
+    data = row_to_dict(venue_detail(venue_id))
+    data['genres'] = venue_genres(venue_id)
+    data['past_shows'], data['upcoming_shows'] = split_shows(venue_shows(venue_id), datetime.now())
+    return data
+
+
+def measure(label, app, function, runs=5):
+    timings = []
+    for _ in range(runs):
+        with app.test_request_context('/venues/1'):
+            app.preprocess_request()
+            started = time.perf_counter()
+            function(1)
+            timings.append(time.perf_counter() - started)
+    print(f'{label:<22} {min(timings) * 1000:8.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shows', type=int, default=10000)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # the app logs to the error.log of the working directory
+        os.chdir(directory)
+        uri = os.environ.get('DATABASE_URL') or f'sqlite:///{directory}/bench.db'
+        app = create_app(SQLALCHEMY_DATABASE_URI=uri, SECRET_KEY='bench', CACHE_TYPE='null',
+                         QUERY_PROFILE_SAMPLE_RATE=0, FRAGMENT_CACHE_SIZE=0)
+        with app.app_context():
+            db.create_all()
+            seed(arguments.shows)
+
+        print(f'venue with {arguments.shows} shows')
+        measure('before, data', app, lambda venue_id: previous_show_venue(venue_id, False))
+        measure('after, data', app, lambda venue_id: current_show_venue(venue_id, False))
+        measure('before, rendered', app, lambda venue_id: previous_show_venue(venue_id, True))
+        measure('after, rendered', app, lambda venue_id: current_show_venue(venue_id, True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import io
+import json
+from datetime import datetime
+
+import click
+from flask import Blueprint, current_app, request, abort, jsonify, stream_with_context
+
+from cache import cache
+from exporter import EXPORTS, MIMETYPES, FORMATS as EXPORT_FORMATS, export
+from importer import FORMATS, importer_for, read_records, guess_format, read_checkpoint, write_checkpoint, clear_checkpoint
+
+blueprint = Blueprint('bulk', __name__, cli_group=None)
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  Bulk import
+#  ----------------------------------------------------------------
+
+def run_import(kind, text_stream, format, skip=0, on_chunk=None):
+  # import records of one kind and invalidate the pages they change
+  importer = importer_for(kind)
+  report = importer.run(read_records(text_stream, format), current_app.config['IMPORT_CHUNK_SIZE'], skip, on_chunk)
+
+  if report['imported']:
+    cache.invalidate(kind,
+                     *[f'venue:{venue_id}' for venue_id in importer.touched['venue']],
+                     *[f'artist:{artist_id}' for artist_id in importer.touched['artist']])
+    if kind == 'shows':
+      cache.invalidate('venues')
+  return report
+
+@blueprint.route('/import/<any(venues, artists, shows):kind>', methods=['POST'])
+def import_records(kind):
+  # stream an uploaded csv or ndjson file (or the raw request body) into the
+  # database, ?skip=<records> resumes a partially imported file
+  upload = request.files.get('file')
+  stream = upload.stream if upload else request.stream
+  format = request.args.get('format') or guess_format(upload.filename if upload else None)
+  if format not in FORMATS:
+    abort(400)
+
+  text_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+  report = run_import(kind, text_stream, format, request.args.get('skip', 0, type=int))
+
+  # a chunk failed to write: the report tells which records to resume from
+  return jsonify(report), 500 if report['error'] else 200
+
+@blueprint.cli.command('import')
+@click.argument('kind', type=click.Choice(['venues', 'artists', 'shows']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--resume', is_flag=True, help='Continue after the last chunk a previous run committed.')
+def import_command(kind, path, format, resume):
+  # import venues, artists or shows from a csv or ndjson file
+  skip = read_checkpoint(path) if resume else 0
+  with open(path, newline='', encoding='utf-8') as records_file:
+    report = run_import(kind, records_file, format or guess_format(path), skip, on_chunk=lambda records_done: write_checkpoint(path, records_done))
+  # after a failed chunk the checkpoint is kept for --resume
+  if report['error'] is None:
+    clear_checkpoint(path)
+
+  print(json.dumps(report, indent=2))
+  if report['error']:
+    raise SystemExit(1)
+
+#  Bulk export
+#  ----------------------------------------------------------------
+
+def parse_since(value):
+  # ISO date or datetime of an incremental export, or None
+  return datetime.fromisoformat(value) if value else None
+
+@blueprint.route('/export/<any(venues, artists, shows):kind>.<any(csv, ndjson, parquet):format>')
+def export_records(kind, format):
+  # stream a whole table, ?since=<iso datetime> only exports the rows changed after it
+  try:
+    since = parse_since(request.args.get('since'))
+  except ValueError:
+    abort(400)
+
+  try:
+    chunks = export(kind, format, since, current_app.config['EXPORT_BATCH_SIZE'])
+  except RuntimeError:
+    # optional dependency of the format is missing
+    abort(501)
+  response = current_app.response_class(stream_with_context(chunks), mimetype=MIMETYPES[format])
+  response.headers['Content-Disposition'] = f'attachment; filename={kind}.{format}'
+  return response
+
+@blueprint.cli.command('export')
+@click.argument('kind', type=click.Choice(list(EXPORTS)))
+@click.option('--format', type=click.Choice(EXPORT_FORMATS), default='csv')
+@click.option('--since', help='Only export rows changed after this ISO date or datetime.')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), help='Defaults to standard output.')
+def export_command(kind, format, since, output):
+  # export venues, artists or shows as csv, ndjson or parquet
+  chunks = export(kind, format, parse_since(since), current_app.config['EXPORT_BATCH_SIZE'])
+  output_file = open(output, 'wb') if output else click.get_binary_stream('stdout')
+  try:
+    for chunk in chunks:
+      output_file.write(chunk)
+  finally:
+    if output:
+      output_file.close()
@@ -0,0 +1,269 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import fcntl
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, request, session, g
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+# Backends keep two kinds of entries: cached values, evicted when the cache
+# is full, and pinned values (the namespace versions and invalidation times of
+# Cache), which are never evicted. An evicted version would read as 0 again
+# and count back up to versions whose stale pages may still be cached
+
+class NullCache:
+    # backend that never stores anything, used when caching is disabled
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def get_pinned(self, key):
+        return None
+
+    def set_pinned(self, key, value):
+        pass
+
+    def incr(self, key):
+        return 0
+
+
+class MemoryCache:
+    # in-process LRU with per-entry expiry, shared by the threads of a worker
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.pinned = dict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        expires = time.time() + timeout if timeout else None
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def get_pinned(self, key):
+        return self.pinned.get(key)
+
+    def set_pinned(self, key, value):
+        with self.lock:
+            self.pinned[key] = value
+
+    def incr(self, key):
+        with self.lock:
+            value = self.pinned.get(key, 0) + 1
+            self.pinned[key] = value
+            return value
+
+
+class FileCache:
+    # one pickle file per key in a shared directory, so every worker process
+    # on the host sees the same entries and invalidations
+
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        # pinned entries live in a subdirectory _prune() never looks into
+        self.pinned_directory = os.path.join(directory, 'pinned')
+        os.makedirs(self.pinned_directory, exist_ok=True)
+
+    def _path(self, key, directory=None):
+        return os.path.join(directory or self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _write(self, path, entry):
+        # write to a temporary file first so readers never see half an entry
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as cache_file:
+            pickle.dump(entry, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    def get(self, key):
+        entry = self._read(self._path(key))
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, timeout):
+        expires = time.time() + timeout if timeout else None
+        self._prune()
+        self._write(self._path(key), (expires, value))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get_pinned(self, key):
+        return self._read(self._path(key, self.pinned_directory))
+
+    def set_pinned(self, key, value):
+        self._write(self._path(key, self.pinned_directory), value)
+
+    def incr(self, key):
+        # counters are updated under an exclusive lock shared by the workers
+        with open(os.path.join(self.directory, 'counters.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                value = (self.get_pinned(key) or 0) + 1
+                self.set_pinned(key, value)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return value
+
+    def _prune(self):
+        # drop the least recently written entries once the directory is full
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.is_file() and not entry.name.endswith(('.tmp', '.lock'))]
+        if len(entries) < self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries + 1]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+class Cache:
+    # caches rendered GET responses per route and arguments. Every entry is
+    # tagged with namespaces (e.g. 'venues', 'venue:3') whose version numbers
+    # are part of its key, so invalidating a namespace is a single increment
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        self.variants = list()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cache_type = app.config.get('CACHE_TYPE', 'null')
+        max_entries = app.config.get('CACHE_MAX_ENTRIES', 1024)
+        if cache_type == 'memory':
+            self.backend = MemoryCache(max_entries)
+        elif cache_type == 'file':
+            self.backend = FileCache(app.config['CACHE_DIR'], max_entries)
+        elif cache_type == 'null':
+            self.backend = NullCache()
+        else:
+            raise ValueError(f'Unknown CACHE_TYPE {cache_type!r}')
+        app.extensions['cache'] = self
+
+    def _versions(self, namespaces):
+        return [self.backend.get_pinned(f'namespace:{namespace}') or 0 for namespace in namespaces]
+
+    def vary(self, function):
+        # pages also depend on function(), e.g. the locale they are rendered in
+        if function not in self.variants:
+            self.variants.append(function)
+        return function
+
+    def invalidate(self, *namespaces):
+        # every cached page tagged with one of the namespaces becomes unreachable
+        now = time.time()
+        for namespace in namespaces:
+            self.backend.incr(f'namespace:{namespace}')
+            self.backend.set_pinned(f'invalidated:{namespace}', now)
+
+    def _invalidated_within(self, namespaces, seconds):
+        since = time.time() - seconds
+        return any((self.backend.get_pinned(f'invalidated:{namespace}') or 0) > since for namespace in namespaces)
+
+    def cached(self, *namespaces, expires_at=None):
+        # cache the view under its path and query arguments. Namespaces are
+        # formatted with the view arguments, e.g. 'venue:{venue_id}'. expires_at
+        # receives the view arguments and returns the datetime at which the
+        # page goes stale (e.g. when its next show starts), or None
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                # pages carrying flashed messages are personal, never cache them
+                if request.method != 'GET' or session.get('_flashes'):
+                    return current_app.ensure_sync(view)(**kwargs)
+
+                tags = [namespace.format(**kwargs) for namespace in namespaces]
+                arguments = sorted(request.args.items(multi=True))
+                variant = ':'.join(function() for function in self.variants)
+                key = f'page:{request.path}:{arguments}:{variant}:{self._versions(tags)}'
+
+                cached_response = self.backend.get(key)
+                if cached_response is not None:
+                    body, status, mimetype = cached_response
+                    return current_app.response_class(body, status=status, mimetype=mimetype)
+
+                response = current_app.make_response(current_app.ensure_sync(view)(**kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                # a page read from a lagging replica right after an
+                # invalidation may predate the write, don't keep it
+                staleness = g.get('read_staleness')
+                if staleness and self._invalidated_within(tags, staleness):
+                    return response
+
+                timeout = current_app.config['CACHE_DEFAULT_TIMEOUT']
+                if expires_at is not None:
+                    stale_at = expires_at(**kwargs)
+                    if stale_at is not None:
+                        timeout = min(timeout, int((stale_at - datetime.now()).total_seconds()))
+                if timeout > 0:
+                    self.backend.set(key, (response.get_data(), response.status_code, response.mimetype), timeout)
+
+                return response
+            return wrapper
+        return decorator
+
+
+# cached pages are tagged with the namespaces they render:
+#   'venues' / 'artists' / 'shows'  the listing pages
+#   'venue:<id>' / 'artist:<id>'    the detail pages
+cache = Cache()
@@ -0,0 +1,52 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from collections import namedtuple
+
+#----------------------------------------------------------------------------#
+# Choice tables.
+#----------------------------------------------------------------------------#
+
+# the closed sets of values of the forms, shared by the form fields (forms.py),
+# the check constraints of the models and the bulk import. Tables are built
+# once and never copied: values keeps the order of the select options,
+# choices holds the (value, label) pairs of the select fields and lookup
+# checks a value in O(1)
+ChoiceTable = namedtuple('ChoiceTable', ['values', 'choices', 'lookup'])
+
+
+def choice_table(values):
+    values = tuple(values)
+    return ChoiceTable(values, tuple((value, value) for value in values), frozenset(values))
+
+
+STATES = choice_table((
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL',
+    'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME',
+    'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH',
+    'OK', 'OR', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'PA', 'RI',
+    'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI',
+    'WY',
+))
+
+GENRES = choice_table((
+    'Alternative',
+    'Blues',
+    'Classical',
+    'Country',
+    'Electronic',
+    'Folk',
+    'Funk',
+    'Hip-Hop',
+    'Heavy Metal',
+    'Instrumental',
+    'Jazz',
+    'Musical Theatre',
+    'Pop',
+    'Punk',
+    'R&B',
+    'Reggae',
+    'Rock n Roll',
+    'Soul',
+    'Other',
+))
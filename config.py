@@ -1,16 +1,121 @@
 import os
-SECRET_KEY = os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
+# Enable debug mode, for development only: FLASK_DEBUG=1 (or flask --debug)
+DEBUG = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+# Signs the session cookie (flashed messages, reads pinned to the primary), so
+# every worker must use the same key. Only development runs without SECRET_KEY
+SECRET_KEY = os.environ.get('SECRET_KEY', 'development key' if DEBUG else None)
 
 # Connect to the database
 
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres@localhost:5432/fyyur'
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://postgres@localhost:5432/fyyur')
+
+# Engine and connection pool, see database.py. Every worker process holds up
+# to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# milliseconds, 0 disables the timeout
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))
+# psycopg2 executemany strategy: 'values_only' or 'values_plus_batch'
+DB_EXECUTEMANY_MODE = os.environ.get('DB_EXECUTEMANY_MODE', 'values_plus_batch')
+DB_INSERTMANYVALUES_PAGE_SIZE = int(os.environ.get('DB_INSERTMANYVALUES_PAGE_SIZE', 1000))
+# connect through PgBouncer in transaction pooling mode
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', '').lower() in ('1', 'true', 'yes')
+
+# Read replicas serving the read-only views, comma separated in
+# DATABASE_REPLICA_URLS. Each request reads from one replica, picked
+# 'round_robin' or by 'least_connections'. Replicas more than REPLICA_MAX_LAG
+# seconds behind or down are skipped (checked every REPLICA_CHECK_INTERVAL
+# seconds), and clients read from the primary for REPLICA_STICKY_SECONDS
+# after they wrote
+SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+REPLICA_SELECTION = os.environ.get('REPLICA_SELECTION', 'round_robin')
+REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))
+REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 5))
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 15))
+
+# Async mode: the detail pages are served by async views running their
+# independent queries concurrently on an async engine (asyncpg for postgres,
+# aiosqlite for sqlite), see async_database.py and asgi.py. ASYNC_DATABASE_URL
+# defaults to DATABASE_URL with the async driver
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '').lower() in ('1', 'true', 'yes')
+ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URL')
 
 # set this configuration to True or False to avoid significant overhead and suppress this warnings
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Pagination of the listing pages, ?per_page= can ask for up to MAX_PAGE_SIZE rows
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 200))
+
+# Stream the listing pages to the client while rows are read from a server-side
+# cursor in batches of STREAM_BATCH_SIZE, pages can then be much larger
+STREAM_LISTINGS = os.environ.get('STREAM_LISTINGS', '').lower() in ('1', 'true', 'yes')
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 500))
+MAX_STREAMED_PAGE_SIZE = int(os.environ.get('MAX_STREAMED_PAGE_SIZE', 100000))
+
+# Response cache of the read-heavy pages: 'memory' (per worker LRU), 'file'
+# (shared by the workers of a host through CACHE_DIR) or 'null' (disabled)
+CACHE_TYPE = os.environ.get('CACHE_TYPE', 'memory')
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(basedir, '.cache', 'pages'))
+CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+
+# Rendered listing tiles kept per worker by the {% cache %} template tag
+# (fragments.py), 0 disables it
+FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 10000))
+
+# Records validated and written per transaction by the bulk import
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))
+
+# Rows read from the server-side cursor and written per chunk by the exports
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+# Compression of the JSON API responses (brotli needs the brotli package)
+API_COMPRESS_MIN_SIZE = int(os.environ.get('API_COMPRESS_MIN_SIZE', 500))
+API_GZIP_LEVEL = int(os.environ.get('API_GZIP_LEVEL', 6))
+API_BROTLI_QUALITY = int(os.environ.get('API_BROTLI_QUALITY', 5))
+
+# Query profiler (profiler.py): the share of requests whose SQL statements
+# are counted and timed into a Server-Timing header and a log line, with the
+# QUERY_PROFILE_SLOWEST slowest statements and the statements repeated
+# QUERY_PROFILE_REPEATED times or more (likely N+1 queries). With
+# QUERY_PROFILE_DEBUG, /_debug/queries lists the latest QUERY_PROFILE_HISTORY
+# reports and an X-Profile-Queries header profiles any request
+QUERY_PROFILE_SAMPLE_RATE = float(os.environ.get('QUERY_PROFILE_SAMPLE_RATE', 0.01))
+QUERY_PROFILE_SLOWEST = int(os.environ.get('QUERY_PROFILE_SLOWEST', 5))
+QUERY_PROFILE_REPEATED = int(os.environ.get('QUERY_PROFILE_REPEATED', 10))
+QUERY_PROFILE_DEBUG = os.environ.get('QUERY_PROFILE_DEBUG', str(DEBUG)).lower() in ('1', 'true', 'yes')
+QUERY_PROFILE_HISTORY = int(os.environ.get('QUERY_PROFILE_HISTORY', 100))
+
+# Templates are compiled into TEMPLATE_CACHE_DIR (see templating.py and the
+# compile-templates command) and loaded by the workers at startup when
+# TEMPLATE_PRELOAD is set. Outside debug mode templates are not checked for
+# changes on every render
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(basedir, '.cache', 'templates'))
+TEMPLATE_PRELOAD = os.environ.get('TEMPLATE_PRELOAD', str(not DEBUG)).lower() in ('1', 'true', 'yes')
+TEMPLATES_AUTO_RELOAD = DEBUG
+
+# Datetime filter of the templates (formatting.py): DATETIME_LOCALE by
+# default (the system locale when unset), or the best Accept-Language match
+# among the comma separated DATETIME_LOCALES. Show times are stored in
+# DATETIME_TIMEZONE, when set they are shown in the zone of the tz cookie.
+# The latest DATETIME_CACHE_SIZE formatted datetimes are kept
+DATETIME_LOCALE = os.environ.get('DATETIME_LOCALE')
+DATETIME_LOCALES = [locale.strip() for locale in os.environ.get('DATETIME_LOCALES', '').split(',') if locale.strip()]
+DATETIME_TIMEZONE = os.environ.get('DATETIME_TIMEZONE')
+DATETIME_CACHE_SIZE = int(os.environ.get('DATETIME_CACHE_SIZE', 4096))
+
+# Booking transactions failing on lock timeouts, deadlocks or serialization
+# failures are retried up to BOOKING_ATTEMPTS times, waiting BOOKING_BACKOFF
+# seconds doubled after every attempt
+BOOKING_ATTEMPTS = int(os.environ.get('BOOKING_ATTEMPTS', 5))
+BOOKING_BACKOFF = float(os.environ.get('BOOKING_BACKOFF', 0.05))
@@ -0,0 +1,159 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from datetime import datetime
+
+from sqlalchemy import event, func, select, update, case, or_
+
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+
+# Venue and Artist keep upcoming_shows_count, past_shows_count and
+# next_show_at in sync with the show table:
+#   * inserting or deleting a Show adjusts the counters of its venue and artist
+#   * roll_over_shows() moves shows that have started from upcoming to past,
+#     only touching entities whose next_show_at has passed
+#   * check_show_counters() / rebuild_show_counters() repair them in bulk,
+#     e.g. after bulk writes that bypass the ORM
+
+# the show column pointing at each counted model
+COUNTED_MODELS = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id,
+}
+
+
+def _as_datetime(value):
+    # start_time may still be the submitted form string before the flush
+    if isinstance(value, str):
+        import dateutil.parser
+        return dateutil.parser.parse(value)
+    return value
+
+
+def _recomputed_counters(model, current_time):
+    # correlated subqueries computing every counter of a model row from scratch
+    foreign_key = COUNTED_MODELS[model]
+    upcoming = Show.start_time > current_time
+
+    return {
+        'upcoming_shows_count': select(func.count(Show.id)).where(foreign_key == model.id, upcoming).scalar_subquery(),
+        'past_shows_count': select(func.count(Show.id)).where(foreign_key == model.id, ~upcoming).scalar_subquery(),
+        'next_show_at': select(func.min(Show.start_time)).where(foreign_key == model.id, upcoming).scalar_subquery(),
+    }
+
+
+def _roll_over(connection, model, current_time, *criteria):
+    # recompute the counters of rows whose next show has already started
+    statement = update(model) \
+        .where(model.next_show_at <= current_time, *criteria) \
+        .values(_recomputed_counters(model, current_time)) \
+        .execution_options(synchronize_session=False)
+    return connection.execute(statement).rowcount
+
+
+@event.listens_for(Show, 'before_insert')
+def _count_inserted_show(mapper, connection, show):
+    current_time = datetime.now()
+    show.start_time = start_time = _as_datetime(show.start_time)
+
+    for model, foreign_key in COUNTED_MODELS.items():
+        entity_id = getattr(show, foreign_key.key)
+        _roll_over(connection, model, current_time, model.id == entity_id)
+
+        if start_time > current_time:
+            values = {
+                'upcoming_shows_count': model.upcoming_shows_count + 1,
+                'next_show_at': case(
+                    (or_(model.next_show_at.is_(None), model.next_show_at > start_time), start_time),
+                    else_=model.next_show_at
+                ),
+            }
+        else:
+            values = {'past_shows_count': model.past_shows_count + 1}
+
+        connection.execute(update(model).where(model.id == entity_id).values(values))
+
+
+@event.listens_for(Show, 'before_delete')
+def _count_deleted_show(mapper, connection, show):
+    current_time = datetime.now()
+    start_time = _as_datetime(show.start_time)
+
+    for model, foreign_key in COUNTED_MODELS.items():
+        entity_id = getattr(show, foreign_key.key)
+        _roll_over(connection, model, current_time, model.id == entity_id)
+
+        if start_time > current_time:
+            # the following upcoming show becomes the next one
+            following_show = select(func.min(Show.start_time)) \
+                .where(foreign_key == model.id, Show.start_time > current_time, Show.id != show.id) \
+                .scalar_subquery()
+            values = {
+                'upcoming_shows_count': model.upcoming_shows_count - 1,
+                'next_show_at': case(
+                    (model.next_show_at == start_time, following_show),
+                    else_=model.next_show_at
+                ),
+            }
+        else:
+            values = {'past_shows_count': model.past_shows_count - 1}
+
+        connection.execute(update(model).where(model.id == entity_id).values(values))
+
+#----------------------------------------------------------------------------#
+# Roll-over and consistency.
+#----------------------------------------------------------------------------#
+
+def roll_over_shows(current_time=None):
+    # move shows that have started since the last run from upcoming to past,
+    # meant to be run periodically (see the rollover-shows command)
+    if current_time is None:
+        current_time = datetime.now()
+
+    rolled_over = dict()
+    for model in COUNTED_MODELS:
+        rolled_over[model.__tablename__] = _roll_over(db.session, model, current_time)
+    db.session.commit()
+
+    return rolled_over
+
+
+def check_show_counters(current_time=None, repair=False):
+    # return the ids of venues and artists whose counters disagree with the
+    # show table, optionally rebuilding just those rows
+    if current_time is None:
+        current_time = datetime.now()
+
+    stale = dict()
+    for model in COUNTED_MODELS:
+        counters = _recomputed_counters(model, current_time)
+        stale_ids = [entity_id for entity_id, in db.session.query(model.id).filter(or_(
+            model.upcoming_shows_count != counters['upcoming_shows_count'],
+            model.past_shows_count != counters['past_shows_count'],
+            model.next_show_at.is_distinct_from(counters['next_show_at']),
+        ))]
+        stale[model.__tablename__] = stale_ids
+
+        if repair and stale_ids:
+            rebuild_show_counters(current_time, model, model.id.in_(stale_ids))
+
+    return stale
+
+
+def rebuild_show_counters(current_time=None, model=None, *criteria):
+    # recompute the counters of every venue and artist (or of the given
+    # model rows) with one UPDATE per table
+    if current_time is None:
+        current_time = datetime.now()
+
+    for counted_model in ([model] if model is not None else COUNTED_MODELS):
+        statement = update(counted_model) \
+            .where(*criteria) \
+            .values(_recomputed_counters(counted_model, current_time)) \
+            .execution_options(synchronize_session=False)
+        db.session.execute(statement)
+    db.session.commit()
@@ -0,0 +1,244 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import os
+import time
+import weakref
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, NullPool
+
+from models import db
+from routing import ReplicaRouter
+
+#----------------------------------------------------------------------------#
+# Pool metrics.
+#----------------------------------------------------------------------------#
+
+class PoolMetrics:
+    # checkout counts and timings of one connection pool of this process.
+    # wait is the time a checkout takes to hand out a connection (queueing
+    # for a free one, connecting, pre-ping), held the time it stays checked out
+
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.held_total = 0.0
+            self.held_max = 0.0
+            self.checkins = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self.lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_held(self, seconds):
+        with self.lock:
+            self.checkins += 1
+            self.held_total += seconds
+            self.held_max = max(self.held_max, seconds)
+
+    def record_connect(self):
+        with self.lock:
+            self.connects += 1
+
+    def snapshot(self, pool):
+        with self.lock:
+            waits = self.checkouts + self.timeouts
+            metrics = {
+                'pid': os.getpid(),
+                'pool': type(pool).__name__,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'wait_avg_ms': round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'held_avg_ms': round(self.held_total / self.checkins * 1000, 3) if self.checkins else 0.0,
+                'held_max_ms': round(self.held_max * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            metrics.update(size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return metrics
+
+
+# metrics of the pool of every instrumented engine (the primary, the read
+# replicas and the async engine), see instrument_pool()
+_engine_metrics = weakref.WeakKeyDictionary()
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool recording how long every checkout waits in the metrics of
+    # its engine
+
+    metrics = None
+
+    def recreate(self):
+        # dispose() replaces the pool of the engine, the metrics carry over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        if self.metrics is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def instrument_pool(engine):
+    # record the checkouts of the pool of one engine in metrics of its own,
+    # returning them
+    metrics = _engine_metrics.get(engine)
+    if metrics is not None:
+        return metrics
+    metrics = _engine_metrics[engine] = PoolMetrics()
+    engine.pool.metrics = metrics
+
+    @event.listens_for(engine, 'connect')
+    def _count_connect(dbapi_connection, connection_record):
+        metrics.record_connect()
+
+    @event.listens_for(engine, 'checkout')
+    def _start_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+        if not isinstance(engine.pool, TimedQueuePool):
+            # other pools (the async one, NullPool) count their checkouts
+            # without timing the wait
+            metrics.record_wait(0.0)
+
+    @event.listens_for(engine, 'checkin')
+    def _end_checkout(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+        if checked_out_at is not None:
+            metrics.record_held(time.perf_counter() - checked_out_at)
+
+    return metrics
+
+
+def pool_metrics(engine):
+    # snapshot of the metrics of the pool of an instrumented engine
+    metrics = _engine_metrics.get(engine) or PoolMetrics()
+    return {'url': engine.url.render_as_string(hide_password=True), **metrics.snapshot(engine.pool)}
+
+#----------------------------------------------------------------------------#
+# Engine.
+#----------------------------------------------------------------------------#
+
+def engine_options(config):
+    # create_engine() arguments of the DB_* settings in config.py
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    backend, driver = url.get_backend_name(), url.get_driver_name()
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'insertmanyvalues_page_size': config['DB_INSERTMANYVALUES_PAGE_SIZE'],
+    }
+
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        # flask-sqlalchemy keeps in-memory databases on one static connection
+        return options
+
+    if config['DB_PGBOUNCER']:
+        # PgBouncer in transaction mode pools the server connections, the
+        # process opens a client connection per checkout instead of keeping
+        # a pool of its own
+        options['poolclass'] = NullPool
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+
+    if backend == 'postgresql':
+        connect_args = dict()
+        if config['DB_STATEMENT_TIMEOUT'] and not config['DB_PGBOUNCER']:
+            # PgBouncer rejects startup options, see init_database()
+            connect_args['options'] = f'-c statement_timeout={config["DB_STATEMENT_TIMEOUT"]}'
+        if config['DB_PGBOUNCER'] and driver == 'psycopg':
+            # prepared statements don't survive switching server connections
+            connect_args['prepare_threshold'] = None
+        if connect_args:
+            options['connect_args'] = connect_args
+        if driver == 'psycopg2':
+            options['executemany_mode'] = config['DB_EXECUTEMANY_MODE']
+
+    return options
+
+
+def init_database(app):
+    # bind the shared db of models.py to the app with one engine built from
+    # config.py, plus one engine per read replica. Options set in
+    # SQLALCHEMY_ENGINE_OPTIONS take precedence
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app.config), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    db.init_app(app)
+    with app.app_context():
+        instrument_pool(db.engine)
+
+    replica_uris = app.config['SQLALCHEMY_REPLICA_URIS']
+    if replica_uris:
+        engines = [create_engine(uri, **engine_options({**app.config, 'SQLALCHEMY_DATABASE_URI': uri})) for uri in replica_uris]
+        for engine in engines:
+            instrument_pool(engine)
+        app.extensions['replicas'] = ReplicaRouter(engines, app.config['REPLICA_SELECTION'], app.config['REPLICA_MAX_LAG'], app.config['REPLICA_CHECK_INTERVAL'])
+        app.after_request(_stick_to_primary)
+
+    statement_timeout = app.config['DB_STATEMENT_TIMEOUT']
+    if app.config['DB_PGBOUNCER'] and statement_timeout:
+        with app.app_context():
+            engine = db.engine
+        if engine.dialect.name == 'postgresql':
+            # one SET LOCAL per transaction, as sessions don't keep settings
+            # across PgBouncer transactions
+            @event.listens_for(engine, 'begin')
+            def _set_statement_timeout(connection):
+                connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(statement_timeout)}')
+
+#----------------------------------------------------------------------------#
+# Read replicas.
+#----------------------------------------------------------------------------#
+
+def _reads_primary():
+    # clients read their own writes from the primary for REPLICA_STICKY_SECONDS
+    return session.get('_read_primary_until', 0) > time.time()
+
+
+def _stick_to_primary(response):
+    if db.session.info.get('wrote'):
+        session['_read_primary_until'] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+
+def replica_reads(view):
+    # the view only reads, its SELECTs may be served by a read replica unless
+    # the client wrote recently
+    @wraps(view)
+    def wrapper(**kwargs):
+        if 'replicas' in current_app.extensions and not _reads_primary():
+            db.session.info['read_only'] = True
+        return current_app.ensure_sync(view)(**kwargs)
+    return wrapper
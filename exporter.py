@@ -0,0 +1,161 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import csv
+import io
+import json
+from datetime import datetime
+
+from models import db, Venue, Artist, Show
+from serializers import VENUE_COLUMNS, ARTIST_COLUMNS, SHOW_COLUMNS
+from genres import genre_list_column
+
+#----------------------------------------------------------------------------#
+# Sources.
+#----------------------------------------------------------------------------#
+
+# venues and artists carry their genres as one comma separated column, which
+# the importer reads back
+EXPORTS = {
+    'venues': (Venue, VENUE_COLUMNS + (genre_list_column(Venue),)),
+    'artists': (Artist, ARTIST_COLUMNS + (genre_list_column(Artist),)),
+    'shows': (Show, SHOW_COLUMNS),
+}
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def export_rows(kind, since=None, batch_size=1000):
+    # rows of one table in primary key order from a server-side cursor, only
+    # the rows written after `since` for incremental exports
+    model, columns = EXPORTS[kind]
+    query = db.session.query(model).with_entities(*columns)
+    if since is not None:
+        query = query.filter(model.updated_at > since)
+    return query.order_by(model.id).yield_per(batch_size)
+
+
+def _batches(rows, size):
+    batch = list()
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = list()
+    if batch:
+        yield batch
+
+#----------------------------------------------------------------------------#
+# Writers.
+#----------------------------------------------------------------------------#
+
+# every writer turns rows into an iterator of encoded chunks, one per batch,
+# so neither a table nor the whole file is ever held in memory
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def write_csv(rows, columns, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in columns])
+    for batch in _batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_ndjson(rows, columns, batch_size):
+    names = [column.name for column in columns]
+    for batch in _batches(rows, batch_size):
+        lines = [json.dumps(dict(zip(names, row)), default=_json_default) for row in batch]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    # write-only file collecting what pyarrow writes until it is drained
+
+    def __init__(self):
+        self.chunks = list()
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = list()
+        return data
+
+
+def write_parquet(rows, columns, batch_size):
+    # one parquet row group per batch. pyarrow is an optional dependency,
+    # only needed for this format
+    import pyarrow
+    import pyarrow.parquet
+
+    names = [column.name for column in columns]
+    schema = pyarrow.schema([(column.name, _arrow_type(pyarrow, column)) for column in columns])
+    sink = _ChunkSink()
+
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        for batch in _batches(rows, batch_size):
+            arrays = [pyarrow.array([row[index] for row in batch], type=schema.field(index).type) for index in range(len(names))]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _arrow_type(pyarrow, column):
+    python_type = column.type.python_type
+    if python_type is int:
+        return pyarrow.int64()
+    if python_type is bool:
+        return pyarrow.bool_()
+    if python_type is datetime:
+        return pyarrow.timestamp('us')
+    return pyarrow.string()
+
+
+WRITERS = {
+    'csv': write_csv,
+    'ndjson': write_ndjson,
+    'parquet': write_parquet,
+}
+
+
+def export(kind, format, since=None, batch_size=1000):
+    # encoded chunks of a whole table export in the given format
+    if kind not in EXPORTS:
+        raise ValueError(f'Unknown export kind {kind!r}')
+    if format not in WRITERS:
+        raise ValueError(f'Unknown export format {format!r}')
+
+    if format == 'parquet':
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError('parquet exports need the pyarrow package')
+
+    model, columns = EXPORTS[kind]
+    return WRITERS[format](export_rows(kind, since, batch_size), columns, batch_size)
@@ -0,0 +1,106 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import g, request
+
+#----------------------------------------------------------------------------#
+# Patterns.
+#----------------------------------------------------------------------------#
+
+# the formats of the templates, other formats are babel patterns or the
+# babel format names ('short', 'long'). babel and dateutil are imported by
+# the first datetime formatted, not when the workers start
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=None)
+def _pattern(format):
+    # parsed babel pattern of a format, None for the babel format names
+    if format in ('short', 'long'):
+        return None
+    import babel.dates
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+
+
+@lru_cache(maxsize=None)
+def _locale(name):
+    import babel.dates
+    return babel.Locale.parse(name or babel.dates.LC_TIME)
+
+
+@lru_cache(maxsize=None)
+def _timezone(name):
+    # the zone of an IANA name, or None when unknown
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+#----------------------------------------------------------------------------#
+# Formatter.
+#----------------------------------------------------------------------------#
+
+class DatetimeFormatter:
+    # the datetime filter of the templates. Datetimes skip parsing, patterns
+    # and locales are parsed once, and the formatted strings of the latest
+    # DATETIME_CACHE_SIZE (value, format, locale, timezone) are kept, as the
+    # show tiles of a page repeat the same start times.
+    # The locale is the best match of Accept-Language among DATETIME_LOCALES
+    # and the timezone the one of the tz cookie. Show times are stored naive
+    # in DATETIME_TIMEZONE and only converted when it is set
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.default_locale = app.config['DATETIME_LOCALE']
+        self.locales = app.config['DATETIME_LOCALES']
+        self.default_timezone = app.config['DATETIME_TIMEZONE']
+        self.source_timezone = _timezone(self.default_timezone) if self.default_timezone else None
+        self._format = lru_cache(maxsize=app.config['DATETIME_CACHE_SIZE'])(self._format_uncached)
+
+        app.before_request(self._select)
+        app.jinja_env.filters['datetime'] = self.format
+        app.extensions['datetime_formatter'] = self
+
+    def _select(self):
+        # locale and timezone of the request
+        g.datetime_locale = request.accept_languages.best_match(self.locales, self.default_locale) if self.locales else self.default_locale
+        timezone = request.cookies.get('tz')
+        g.datetime_timezone = timezone if self.source_timezone and timezone and _timezone(timezone) else self.default_timezone
+
+    def variant(self):
+        # what a rendered page depends on besides its arguments, see cache.vary()
+        return f'{g.get("datetime_locale")}:{g.get("datetime_timezone")}'
+
+    def format(self, value, format='medium'):
+        if value is None or value == '':
+            return ''
+        if not isinstance(value, datetime):
+            import dateutil.parser
+            value = dateutil.parser.parse(value)
+        return self._format(value, format, g.get('datetime_locale', self.default_locale), g.get('datetime_timezone', self.default_timezone))
+
+    def _format_uncached(self, value, format, locale, timezone):
+        if value.tzinfo is None:
+            if self.source_timezone is not None and timezone:
+                value = value.replace(tzinfo=self.source_timezone).astimezone(_timezone(timezone))
+            else:
+                # as babel.dates.format_datetime() takes naive datetimes
+                value = value.replace(tzinfo=dt_timezone.utc)
+        pattern = _pattern(format)
+        if pattern is None:
+            import babel.dates
+            return babel.dates.format_datetime(value, format, locale=_locale(locale))
+        return pattern.apply(value, _locale(locale))
+
+
+datetime_formatter = DatetimeFormatter()
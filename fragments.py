@@ -0,0 +1,50 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from cache import MemoryCache
+
+#----------------------------------------------------------------------------#
+# Fragment cache.
+#----------------------------------------------------------------------------#
+
+class FragmentCacheExtension(Extension):
+    # {% cache key %}...{% endcache %} renders its body once per key and
+    # emits the kept markup afterwards. Keys name the entities a fragment
+    # shows with their versions, e.g. ('artist', artist.id, artist.version),
+    # so an edit makes the old fragment unreachable and the LRU drops it.
+    # Fragments also depend on the locale and timezone of the request, like
+    # the cached pages (see Cache.vary)
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None, fragment_variants=())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [key]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        fragments = self.environment.fragment_cache
+        if fragments is None:
+            return caller()
+        key = (key, *(variant() for variant in self.environment.fragment_variants))
+        fragment = fragments.get(key)
+        if fragment is None:
+            fragment = caller()
+            fragments.set(key, fragment, None)
+        return fragment
+
+
+def init_fragments(app, variants=()):
+    # enable {% cache %} in the templates of the app, keeping up to
+    # FRAGMENT_CACHE_SIZE fragments per worker (0 renders them every time)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    size = app.config['FRAGMENT_CACHE_SIZE']
+    app.jinja_env.fragment_cache = MemoryCache(size) if size else None
+    app.jinja_env.fragment_variants = tuple(variants)
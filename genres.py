@@ -0,0 +1,105 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from sqlalchemy import func, select, insert, delete, exists
+
+from models import db, Venue, Artist, Genre, venue_genre, artist_genre
+
+#----------------------------------------------------------------------------#
+# Association tables.
+#----------------------------------------------------------------------------#
+
+# owner column of the association table of each model with genres
+GENRE_OWNERS = {Venue: venue_genre.c.venue_id, Artist: artist_genre.c.artist_id}
+
+
+def _association(model):
+    owner = GENRE_OWNERS[model]
+    return owner.table, owner
+
+#----------------------------------------------------------------------------#
+# Reads.
+#----------------------------------------------------------------------------#
+
+def genre_names_query(model, owner_id):
+    # sorted genre names of one venue or artist
+    table, owner = _association(model)
+    return db.session.query(Genre.name) \
+        .join(table, table.c.genre_id == Genre.id) \
+        .filter(owner == owner_id) \
+        .order_by(Genre.name)
+
+
+def genre_names(model, owner_id):
+    return [name for name, in genre_names_query(model, owner_id)]
+
+
+# most links a genre may have for its listings to be read from the links.
+# Those cost about 1.3us per link, an EXISTS probe per row of the listing
+# index about as much per row, so reading the links wins while they are
+# fewer than sqrt(page size x rows): some 7000 for 50 rows of 1M venues
+GENRE_SELECTIVE_LINKS = 5000
+
+
+def _is_selective(model, genre_id):
+    # whether the genre has at most GENRE_SELECTIVE_LINKS links, counting no
+    # further than that in the genre index of the association table
+    table, owner = _association(model)
+    links = select(owner).where(table.c.genre_id == genre_id).limit(GENRE_SELECTIVE_LINKS + 1).subquery()
+    return db.session.execute(select(func.count()).select_from(links)).scalar() <= GENRE_SELECTIVE_LINKS
+
+
+def genre_filter(model, genre):
+    # criterion keeping the venues or artists of one genre, its name resolved
+    # once through its unique index. The rows of a rare genre are read from
+    # its links in the (genre_id, owner) index of the association table and
+    # sorted. Otherwise every row of the listing index is probed in the
+    # (owner, genre_id) key, so a page stops after its rows instead of
+    # reading every owner of the genre first. See benchmarks/bench_genres.py
+    table, owner = _association(model)
+    genre_id = select(Genre.id).where(Genre.name == genre).scalar_subquery()
+    if _is_selective(model, genre_id):
+        return model.id.in_(select(owner).where(table.c.genre_id == genre_id))
+    return exists().where(owner == model.id, table.c.genre_id == genre_id)
+
+
+def genre_list_column(model):
+    # comma separated genre names of each row, the csv format of the importer
+    table, owner = _association(model)
+    return select(func.aggregate_strings(Genre.name, ',')) \
+        .join(table, table.c.genre_id == Genre.id) \
+        .where(owner == model.id) \
+        .scalar_subquery().label('genres')
+
+#----------------------------------------------------------------------------#
+# Writes.
+#----------------------------------------------------------------------------#
+
+def genre_ids(names):
+    # map genre names to their ids, creating the genres seen for the first time
+    names = set(names)
+    if not names:
+        return dict()
+    ids = dict(db.session.query(Genre.name, Genre.id).filter(Genre.name.in_(names)))
+    missing = names - ids.keys()
+    if missing:
+        db.session.execute(insert(Genre), [{'name': name} for name in sorted(missing)])
+        ids.update(db.session.query(Genre.name, Genre.id).filter(Genre.name.in_(missing)))
+    return ids
+
+
+def add_genres(model, genres_by_owner):
+    # link many venues or artists to their genres, {owner_id: [names]}
+    table, owner = _association(model)
+    ids = genre_ids(name for names in genres_by_owner.values() for name in names)
+    rows = [{owner.name: owner_id, 'genre_id': ids[name]}
+            for owner_id, names in genres_by_owner.items() for name in set(names)]
+    if rows:
+        db.session.execute(insert(table), rows)
+
+
+def set_genres(model, owner_id, names):
+    # replace the genres of one venue or artist
+    table, owner = _association(model)
+    db.session.execute(delete(table).where(owner == owner_id))
+    add_genres(model, {owner_id: names})
@@ -0,0 +1,443 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import csv
+import io
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import String, func, insert, select
+
+from models import db, Venue, Artist, Show, Area, DEFAULT_SHOW_DURATION
+from serializers import VENUE_FORM_COLUMNS, ARTIST_FORM_COLUMNS, VENUE_REQUIRED_FIELDS, ARTIST_REQUIRED_FIELDS, \
+    LIST_FIELDS, BOOLEAN_FIELDS
+from choices import STATES, GENRES
+from counters import rebuild_show_counters
+from search import rebuild_indexes
+from genres import add_genres
+from areas import area_ids, recount_areas
+from bookings import MAX_SHOW_DURATION, BOOKED_MODELS, load_intervals, rebuild_booking_indexes
+
+#----------------------------------------------------------------------------#
+# Readers.
+#----------------------------------------------------------------------------#
+
+FORMATS = ('csv', 'ndjson')
+
+
+def guess_format(filename):
+    # ndjson for .ndjson/.jsonl files, csv otherwise
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return 'csv'
+
+
+class MalformedRecord:
+    # a line of the file that holds no record, reported as the error of its row
+
+    def __init__(self, message):
+        self.message = message
+
+
+def _json_lines(text_stream):
+    for line in text_stream:
+        if not line.strip():
+            yield None
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield MalformedRecord(f'Not valid JSON: {error}.')
+            continue
+        yield record if isinstance(record, dict) else MalformedRecord('Not a JSON object.')
+
+
+def read_records(text_stream, format):
+    # yield one dict per record without reading the whole file, None for
+    # blank lines and a MalformedRecord for lines that hold no record.
+    # Multi-valued fields (genres) are either lists or strings separated by
+    # commas, which is how csv files hold them inside a cell
+    if format == 'ndjson':
+        records = _json_lines(text_stream)
+    elif format == 'csv':
+        records = csv.DictReader(text_stream)
+    else:
+        raise ValueError(f'Unknown import format {format!r}')
+
+    for record in records:
+        if isinstance(record, dict):
+            for name in LIST_FIELDS & record.keys():
+                if isinstance(record[name], str):
+                    record[name] = [value.strip() for value in record[name].split(',') if value.strip()]
+        yield record
+
+#----------------------------------------------------------------------------#
+# Validation.
+#----------------------------------------------------------------------------#
+
+# Records are checked column by column against the rules of the forms
+# (forms.py) rather than by processing a form per record, which costs more
+# than writing the row. The messages are the ones of the form validators
+
+REQUIRED = 'This field is required.'
+
+# like the URL() validator of the forms: a scheme and a host with a top-level domain
+URL_PATTERN = re.compile(r'^[a-z]+://([a-z0-9_-]+\.)+([a-z]{2,20}|xn--[a-z0-9-]+)(:[0-9]+)?([/?].*)?$', re.IGNORECASE)
+
+
+def _to_boolean(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'y', 'yes', 'true', 'on')
+    return bool(value)
+
+
+def _to_datetime(value):
+    # datetimes of json records are ISO strings, dateutil reads the rest
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        import dateutil.parser
+        return dateutil.parser.parse(value)
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip()) or value == []
+
+
+def _invalid_choices(values, table):
+    # errors of the values missing from a table of choices.py, worded like
+    # the multiple select fields of the forms, or None
+    unacceptable = sorted(set(values) - table.lookup)
+    if not unacceptable:
+        return None
+    if len(unacceptable) == 1:
+        return [f"'{unacceptable[0]}' is not a valid choice for this field."]
+    return ["'{}' are not valid choices for this field.".format("', '".join(unacceptable))]
+
+
+class Importer:
+    # loads one kind of record in chunks: every record is validated with the
+    # rules of the form used by the create page, foreign keys of a chunk are
+    # resolved with one query per table and the valid rows are written with
+    # one COPY (on postgres) or executemany per chunk
+
+    # fields checked against a table of choices.py
+    CHOICES = {'state': STATES}
+    # fields that must be URLs, like the URL() validator of the forms
+    URLS = frozenset(('facebook_link',))
+
+    def __init__(self, model, columns, required=frozenset()):
+        self.model = model
+        self.columns = columns
+        names = [column.name for column in columns]
+        self.booleans = tuple(name for name in names if name in BOOLEAN_FIELDS)
+        self.strings = tuple(name for name in names if name not in BOOLEAN_FIELDS)
+        # (name, rules) of the fields with rules, worked out once per import
+        lengths = {column.name: column.type.length for column in columns
+                   if isinstance(column.type, String) and column.type.length}
+        self.rules = tuple((name, (name in required, self.CHOICES.get(name), name in self.URLS, lengths.get(name)))
+                           for name in self.strings
+                           if name in required or name in self.CHOICES or name in self.URLS or name in lengths)
+        # ids of the venues and artists whose pages the import changed
+        self.touched = {'venue': set(), 'artist': set()}
+
+    def validate(self, record):
+        # return (row, errors) for one record
+        row = dict()
+        for name in self.strings:
+            value = record.get(name)
+            if value is not None and value.__class__ is not str:
+                value = str(value)
+            row[name] = value
+        for name in self.booleans:
+            row[name] = _to_boolean(record.get(name))
+
+        errors = None
+        for name, (required, table, url, length) in self.rules:
+            value = row[name]
+            if required and (value is None or not value.strip()):
+                message = REQUIRED
+            elif table is not None and value not in table.lookup:
+                message = 'Not a valid choice.'
+            elif url and not URL_PATTERN.match(value or ''):
+                message = 'Invalid URL.'
+            elif length and value is not None and len(value) > length:
+                message = f'Field cannot be longer than {length} characters.'
+            else:
+                continue
+            if errors is None:
+                errors = dict()
+            errors[name] = [message]
+        if errors:
+            return None, errors
+        return row, None
+
+    def resolve(self, rows):
+        # check the foreign keys of a chunk, returning {index: errors}
+        return dict()
+
+    def write(self, rows):
+        connection = db.session.connection()
+        if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+            self._copy(connection, rows)
+        else:
+            db.session.execute(insert(self.model.__table__), rows)
+
+    def _copy(self, connection, rows):
+        # COPY the chunk as csv through the raw psycopg2 connection
+        names = [column.name for column in self.columns]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([r'\N' if row[name] is None else row[name] for name in names])
+        buffer.seek(0)
+
+        cursor = connection.connection.cursor()
+        cursor.copy_expert(f'COPY {self.model.__tablename__} ({", ".join(names)}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buffer)
+
+    def finish(self, rows):
+        # work that bulk writes skip because they bypass the ORM events
+        rebuild_indexes()
+
+    def run(self, records, chunk_size, skip=0, on_chunk=None):
+        # import records after skipping the first `skip` of them, calling
+        # on_chunk(records_done) after each committed chunk so the caller can
+        # checkpoint. Returns a report with the per-row errors. A chunk that
+        # fails to write stops the import, the report then holds the error
+        # and the records of that chunk, the earlier chunks stay committed
+        report = {'imported': 0, 'skipped': skip, 'failed': 0, 'errors': [], 'error': None}
+        records = enumerate(records, start=1)
+        for _ in islice(records, skip):
+            pass
+
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            rows, numbers = list(), list()
+            for number, record in chunk:
+                if record is None:
+                    continue
+                if isinstance(record, MalformedRecord):
+                    row, errors = None, {'record': [record.message]}
+                else:
+                    row, errors = self.validate(record)
+                if errors:
+                    report['errors'].append({'record': number, 'errors': errors})
+                    continue
+                rows.append(row)
+                numbers.append(number)
+
+            unresolved = self.resolve(rows)
+            for index in sorted(unresolved):
+                report['errors'].append({'record': numbers[index], 'errors': unresolved[index]})
+            rows = [row for index, row in enumerate(rows) if index not in unresolved]
+
+            try:
+                if rows:
+                    self.write(rows)
+                db.session.commit()
+            except Exception as error:
+                db.session.rollback()
+                logging.getLogger('importer').exception('Import of records %d to %d failed', chunk[0][0], chunk[-1][0])
+                report['error'] = {'records': [chunk[0][0], chunk[-1][0]], 'message': str(error)}
+                break
+            if rows:
+                self.finish(rows)
+
+            report['imported'] += len(rows)
+            if on_chunk is not None:
+                on_chunk(chunk[-1][0])
+
+        report['failed'] = len(report['errors'])
+        return report
+
+
+class GenreImporter(Importer):
+    # venues and artists, whose genres are linked in an association table.
+    # Their rows are inserted with RETURNING (batched by insertmanyvalues)
+    # instead of COPY, for the ids the genre links point at, except on sqlite
+
+    def validate(self, record):
+        row, errors = super().validate(record)
+        genres = record.get('genres')
+        if _is_blank(genres):
+            genre_errors = [REQUIRED]
+        else:
+            genres = [genres] if isinstance(genres, str) else [str(genre) for genre in genres]
+            genre_errors = _invalid_choices(genres, GENRES)
+        if genre_errors:
+            return None, dict(errors or (), genres=genre_errors)
+        if row is not None:
+            row['genres'] = genres
+        return row, errors
+
+    def write(self, rows):
+        genres = [row.pop('genres') for row in rows]
+        table = self.model.__table__
+        if db.session.get_bind().dialect.name == 'sqlite':
+            # sqlite runs ordered RETURNING inserts one row at a time. Rows
+            # get the ids after the largest one, and the transaction holds
+            # the write lock after the insert, so the chunk got the last ids
+            db.session.execute(insert(table), rows)
+            last_id = db.session.scalar(select(func.max(table.c.id)))
+            ids = range(last_id - len(rows) + 1, last_id + 1)
+        else:
+            ids = db.session.scalars(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows).all()
+        add_genres(self.model, dict(zip(ids, genres)))
+
+
+class VenueImporter(GenreImporter):
+    # venues point at the area of their city and state, the areas of a chunk
+    # are created and recounted once per chunk
+
+    def write(self, rows):
+        ids = area_ids((row['city'], row['state']) for row in rows)
+        for row in rows:
+            row['area_id'] = ids[(row['city'], row['state'])]
+        super().write(rows)
+        recount_areas(Area.id.in_(set(ids.values())))
+
+
+class ShowImporter(Importer):
+    # shows end at their end_time or after their duration in minutes, and are
+    # rejected when they overlap a booking of their venue or artist
+
+    def __init__(self):
+        super().__init__(Show, (Show.__table__.c.artist_id, Show.__table__.c.venue_id, Show.__table__.c.start_time, Show.__table__.c.end_time))
+
+    def validate(self, record):
+        errors = dict()
+        row = {'artist_id': record.get('artist_id'), 'venue_id': record.get('venue_id')}
+        for name in row:
+            try:
+                row[name] = int(row[name])
+            except (TypeError, ValueError):
+                errors[name] = ['Not a valid id.']
+
+        try:
+            row['start_time'] = None if _is_blank(record.get('start_time')) else _to_datetime(record['start_time'])
+        except (TypeError, ValueError, OverflowError):
+            errors['start_time'] = ['Not a valid datetime value.']
+        else:
+            if row['start_time'] is None:
+                errors['start_time'] = [REQUIRED]
+
+        # minutes, like the duration field of the form
+        duration = record.get('duration')
+        if _is_blank(duration):
+            duration = None
+        else:
+            try:
+                duration = int(duration)
+            except (TypeError, ValueError):
+                errors['duration'] = ['Not a valid integer value.']
+            else:
+                if not 1 <= duration <= 24 * 60:
+                    errors['duration'] = [f'Number must be between 1 and {24 * 60}.']
+
+        try:
+            row['end_time'] = None if _is_blank(record.get('end_time')) else _to_datetime(record['end_time'])
+        except (TypeError, ValueError, OverflowError):
+            errors['end_time'] = ['Not a valid datetime value.']
+        if errors:
+            return None, errors
+
+        if row['end_time'] is None:
+            row['end_time'] = row['start_time'] + (timedelta(minutes=duration) if duration else DEFAULT_SHOW_DURATION)
+        if not timedelta(0) < row['end_time'] - row['start_time'] <= MAX_SHOW_DURATION:
+            return None, {'end_time': [f'Shows must end after they start and last at most {MAX_SHOW_DURATION}.']}
+        return row, None
+
+    def resolve(self, rows):
+        # one query per referenced table for the whole chunk
+        artist_ids = {row['artist_id'] for row in rows}
+        venue_ids = {row['venue_id'] for row in rows}
+        known_artists = {artist_id for artist_id, in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))} if artist_ids else set()
+        known_venues = {venue_id for venue_id, in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))} if venue_ids else set()
+
+        unresolved = dict()
+        for index, row in enumerate(rows):
+            errors = dict()
+            if row['artist_id'] not in known_artists:
+                errors['artist_id'] = [f'Artist {row["artist_id"]} does not exist.']
+            if row['venue_id'] not in known_venues:
+                errors['venue_id'] = [f'Venue {row["venue_id"]} does not exist.']
+            if errors:
+                unresolved[index] = errors
+        if not rows:
+            return unresolved
+
+        # bookings overlapping the chunk are loaded with one range scan per
+        # table, the accepted rows are added so the chunk can't double-book
+        # either
+        start = min(row['start_time'] for row in rows)
+        end = max(row['end_time'] for row in rows)
+        bookings = {model: load_intervals(model, {row[foreign_key.key] for row in rows}, start, end)
+                    for model, foreign_key in BOOKED_MODELS.items()}
+        for index, row in enumerate(rows):
+            if index in unresolved:
+                continue
+            errors = dict()
+            for model, foreign_key in BOOKED_MODELS.items():
+                interval = bookings[model][row[foreign_key.key]].conflict(row['start_time'], row['end_time'])
+                if interval is not None:
+                    booked = f'show {interval[2]}' if interval[2] is not None else 'an earlier record'
+                    errors[foreign_key.key] = [f'{model.__name__} {row[foreign_key.key]} is already booked for {booked}.']
+            if errors:
+                unresolved[index] = errors
+                continue
+            for model, foreign_key in BOOKED_MODELS.items():
+                bookings[model][row[foreign_key.key]].add(row['start_time'], row['end_time'], None)
+        return unresolved
+
+    def finish(self, rows):
+        # bulk inserted shows skip the counter events, rebuild the touched rows
+        venue_ids = {row['venue_id'] for row in rows}
+        artist_ids = {row['artist_id'] for row in rows}
+        rebuild_show_counters(None, Venue, Venue.id.in_(venue_ids))
+        rebuild_show_counters(None, Artist, Artist.id.in_(artist_ids))
+        rebuild_booking_indexes()
+        self.touched['venue'].update(venue_ids)
+        self.touched['artist'].update(artist_ids)
+
+
+def importer_for(kind):
+    if kind == 'venues':
+        return VenueImporter(Venue, VENUE_FORM_COLUMNS, VENUE_REQUIRED_FIELDS)
+    if kind == 'artists':
+        return GenreImporter(Artist, ARTIST_FORM_COLUMNS, ARTIST_REQUIRED_FIELDS)
+    if kind == 'shows':
+        return ShowImporter()
+    raise ValueError(f'Unknown import kind {kind!r}')
+
+#----------------------------------------------------------------------------#
+# Checkpoints.
+#----------------------------------------------------------------------------#
+
+def read_checkpoint(path):
+    # number of records already imported from the file at path
+    try:
+        with open(path + '.checkpoint') as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, records_done):
+    with open(path + '.checkpoint', 'w') as checkpoint:
+        checkpoint.write(str(records_done))
+
+
+def clear_checkpoint(path):
+    try:
+        os.remove(path + '.checkpoint')
+    except FileNotFoundError:
+        pass
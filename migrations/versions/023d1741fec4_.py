@@ -0,0 +1,28 @@
+"""venue and artist versions keying the cached listing tiles
+
+Revision ID: 023d1741fec4
+Revises: 5622c845d663
+Create Date: 2026-10-18 17:24:53.871204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '023d1741fec4'
+down_revision = '5622c845d663'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('venue', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('artist', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('artist') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('venue') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,50 @@
+"""area table of the venue cities and states
+
+Revision ID: 5622c845d663
+Revises: c268ffaeaf61
+Create Date: 2026-10-18 16:41:27.318096
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5622c845d663'
+down_revision = 'c268ffaeaf61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('area',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('city', sa.String(length=120), nullable=False),
+        sa.Column('state', sa.String(length=120), nullable=False),
+        sa.Column('venue_count', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('city', 'state', name='uq_area_city_state')
+    )
+    op.create_index('ix_area_state_city', 'area', ['state', 'city'], unique=False)
+    with op.batch_alter_table('venue') as batch_op:
+        batch_op.add_column(sa.Column('area_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_venue_area_id'), ['area_id'], unique=False)
+        batch_op.create_foreign_key('fk_venue_area_id_area', 'area', ['area_id'], ['id'])
+
+    # one area per city and state of the existing venues
+    op.execute('''
+        INSERT INTO area (city, state, venue_count)
+        SELECT city, state, COUNT(*) FROM venue
+        WHERE city IS NOT NULL AND state IS NOT NULL
+        GROUP BY city, state
+    ''')
+    op.execute('UPDATE venue SET area_id = (SELECT area.id FROM area WHERE area.city = venue.city AND area.state = venue.state)')
+
+
+def downgrade():
+    with op.batch_alter_table('venue') as batch_op:
+        batch_op.drop_constraint('fk_venue_area_id_area', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_venue_area_id'))
+        batch_op.drop_column('area_id')
+    op.drop_index('ix_area_state_city', table_name='area')
+    op.drop_table('area')
@@ -0,0 +1,59 @@
+"""check constraints limiting states and genres to the choices of the forms
+
+Revision ID: 5f94ce0ca3d8
+Revises: 023d1741fec4
+Create Date: 2026-10-18 18:02:11.508317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f94ce0ca3d8'
+down_revision = '023d1741fec4'
+branch_labels = None
+depends_on = None
+
+# choices.py at this revision
+STATES = (
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL',
+    'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME',
+    'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH',
+    'OK', 'OR', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'PA', 'RI',
+    'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI',
+    'WY',
+)
+GENRES = (
+    'Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk',
+    'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+    'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul',
+    'Other',
+)
+
+CONSTRAINTS = (
+    ('venue', 'state', 'ck_venue_state', STATES),
+    ('artist', 'state', 'ck_artist_state', STATES),
+    ('genre', 'name', 'ck_genre_name', GENRES),
+)
+
+
+def upgrade():
+    connection = op.get_bind()
+    for table, column, name, values in CONSTRAINTS:
+        condition = sa.column(column).in_(values)
+        invalid = connection.execute(
+            sa.select(sa.column('id'), sa.column(column)).select_from(sa.table(table))
+            .where(sa.not_(condition)).limit(10)
+        ).all()
+        if invalid:
+            raise RuntimeError(f'Correct the {column} of the {table} rows {invalid} before upgrading.')
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_check_constraint(name, condition)
+
+
+def downgrade():
+    for table, column, name, values in reversed(CONSTRAINTS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(name, type_='check')
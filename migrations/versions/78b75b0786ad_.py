@@ -0,0 +1,34 @@
+"""updated_at on venue, artist and show for incremental exports
+
+Revision ID: 78b75b0786ad
+Revises: b5db9e2eb2d1
+Create Date: 2026-10-18 13:02:44.718250
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '78b75b0786ad'
+down_revision = 'b5db9e2eb2d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('venue', 'artist', 'show'):
+        # sqlite cannot add a column with a CURRENT_TIMESTAMP default, add it
+        # nullable, backfill it and then set the default and NOT NULL (batch
+        # mode recreates the table on sqlite)
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(sa.table(table, sa.column('updated_at')).update().values(updated_at=sa.func.current_timestamp()))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False)
+        op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in ('show', 'artist', 'venue'):
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
+        op.drop_column(table, 'updated_at')
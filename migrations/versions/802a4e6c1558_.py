@@ -0,0 +1,28 @@
+"""composite indexes on show foreign keys and start_time
+
+Revision ID: 802a4e6c1558
+Revises: fd9e286af71c
+Create Date: 2026-10-18 10:41:52.917364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '802a4e6c1558'
+down_revision = 'fd9e286af71c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # INCLUDE columns are only understood by postgres (11+), other databases
+    # get the plain composite indexes
+    op.create_index('ix_show_venue_id_start_time', 'show', ['venue_id', 'start_time'], unique=False, postgresql_include=['artist_id'])
+    op.create_index('ix_show_artist_id_start_time', 'show', ['artist_id', 'start_time'], unique=False, postgresql_include=['venue_id'])
+
+
+def downgrade():
+    op.drop_index('ix_show_artist_id_start_time', table_name='show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='show')
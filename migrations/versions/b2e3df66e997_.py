@@ -0,0 +1,59 @@
+"""show end_time and booking exclusion constraints
+
+Revision ID: b2e3df66e997
+Revises: cb837c1bc0b3
+Create Date: 2026-10-18 15:08:37.220614
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e3df66e997'
+down_revision = 'cb837c1bc0b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    postgresql = connection.dialect.name == 'postgresql'
+
+    # existing shows get the default duration of two hours
+    op.add_column('show', sa.Column('end_time', sa.DateTime(), nullable=True))
+    if postgresql:
+        op.execute("UPDATE show SET end_time = start_time + interval '2 hours'")
+    else:
+        op.execute("UPDATE show SET end_time = datetime(start_time, '+2 hours')")
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.alter_column('end_time', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_check_constraint('ck_show_end_time_after_start_time', 'end_time > start_time')
+
+    # other databases check bookings against the fallback indexes in bookings.py
+    if not postgresql:
+        return
+
+    for column in ('venue_id', 'artist_id'):
+        overlapping = connection.execute(sa.text(f'''
+            SELECT first.id, second.id FROM show AS first JOIN show AS second
+                ON first.{column} = second.{column} AND first.id < second.id
+                AND first.start_time < second.end_time AND second.start_time < first.end_time
+            LIMIT 10
+        ''')).all()
+        if overlapping:
+            raise RuntimeError(f'Resolve the double bookings (same {column}) of shows {overlapping} before upgrading.')
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    for column in ('venue_id', 'artist_id'):
+        op.execute(f'ALTER TABLE show ADD CONSTRAINT ex_show_{column}_booking EXCLUDE USING gist ({column} WITH =, tsrange(start_time, end_time) WITH &&)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in ('artist_id', 'venue_id'):
+            op.execute(f'ALTER TABLE show DROP CONSTRAINT ex_show_{column}_booking')
+
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.drop_constraint('ck_show_end_time_after_start_time', type_='check')
+        batch_op.drop_column('end_time')
@@ -0,0 +1,28 @@
+"""keyset pagination indexes for the listing pages
+
+Revision ID: b5db9e2eb2d1
+Revises: 802a4e6c1558
+Create Date: 2026-10-18 11:27:05.630418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5db9e2eb2d1'
+down_revision = '802a4e6c1558'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_venue_city_state_name_id', 'venue', ['city', 'state', 'name', 'id'], unique=False)
+    op.create_index('ix_artist_name_id', 'artist', ['name', 'id'], unique=False)
+    op.create_index('ix_show_start_time_id', 'show', ['start_time', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time_id', table_name='show')
+    op.drop_index('ix_artist_name_id', table_name='artist')
+    op.drop_index('ix_venue_city_state_name_id', table_name='venue')
@@ -0,0 +1,26 @@
+"""idempotency keys of show bookings
+
+Revision ID: c268ffaeaf61
+Revises: b2e3df66e997
+Create Date: 2026-10-18 15:52:19.604381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c268ffaeaf61'
+down_revision = 'b2e3df66e997'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('show', sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_show_idempotency_key'), 'show', ['idempotency_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_show_idempotency_key'), table_name='show')
+    op.drop_column('show', 'idempotency_key')
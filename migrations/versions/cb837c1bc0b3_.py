@@ -0,0 +1,83 @@
+"""genre table and venue/artist association tables replacing the genres strings
+
+Revision ID: cb837c1bc0b3
+Revises: 78b75b0786ad
+Create Date: 2026-10-18 14:21:09.512803
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cb837c1bc0b3'
+down_revision = '78b75b0786ad'
+branch_labels = None
+depends_on = None
+
+
+def parse_genres(value):
+    # genres strings were written either as postgres array literals
+    # ('{Jazz,"Rock n Roll"}') or as python lists ("['Jazz', 'Rock n Roll']")
+    if not value:
+        return []
+    names = [name.strip().strip('"\'').strip() for name in value.strip().strip('{}[]').split(',')]
+    return [name for name in names if name]
+
+
+def upgrade():
+    genre = op.create_table('genre',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    for table in ('venue', 'artist'):
+        op.create_table(f'{table}_genre',
+            sa.Column(f'{table}_id', sa.Integer(), nullable=False),
+            sa.Column('genre_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['genre_id'], ['genre.id'], ),
+            sa.ForeignKeyConstraint([f'{table}_id'], [f'{table}.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint(f'{table}_id', 'genre_id')
+        )
+        op.create_index(f'ix_{table}_genre_genre_id_{table}_id', f'{table}_genre', ['genre_id', f'{table}_id'], unique=False)
+    op.create_index('ix_venue_state_city_name_id', 'venue', ['state', 'city', 'name', 'id'], unique=False)
+
+    # move the genres of existing rows into the association tables
+    connection = op.get_bind()
+    genres_by_table = {
+        table: {row_id: parse_genres(value) for row_id, value in connection.execute(sa.text(f'SELECT id, genres FROM {table}'))}
+        for table in ('venue', 'artist')
+    }
+    names = sorted({name for genres in genres_by_table.values() for names in genres.values() for name in names})
+    if names:
+        op.bulk_insert(genre, [{'name': name} for name in names])
+    genre_ids = dict(connection.execute(sa.text('SELECT name, id FROM genre')).all())
+    for table, genres in genres_by_table.items():
+        links = [{'owner_id': row_id, 'genre_id': genre_ids[name]} for row_id, names in genres.items() for name in set(names)]
+        if links:
+            connection.execute(sa.text(f'INSERT INTO {table}_genre ({table}_id, genre_id) VALUES (:owner_id, :genre_id)'), links)
+
+    op.drop_column('venue', 'genres')
+    op.drop_column('artist', 'genres')
+
+
+def downgrade():
+    op.add_column('artist', sa.Column('genres', sa.VARCHAR(length=120), server_default='', nullable=False))
+    op.add_column('venue', sa.Column('genres', sa.VARCHAR(length=500), nullable=True))
+
+    # write the genres back as postgres array literals
+    connection = op.get_bind()
+    for table in ('venue', 'artist'):
+        genres = dict()
+        for row_id, name in connection.execute(sa.text(f'SELECT {table}_genre.{table}_id, genre.name FROM {table}_genre JOIN genre ON genre.id = {table}_genre.genre_id ORDER BY genre.name')):
+            genres.setdefault(row_id, []).append(f'"{name}"' if ' ' in name else name)
+        if genres:
+            connection.execute(sa.text(f'UPDATE {table} SET genres = :genres WHERE id = :id'),
+                               [{'id': row_id, 'genres': '{' + ','.join(names) + '}'} for row_id, names in genres.items()])
+
+    op.drop_index('ix_venue_state_city_name_id', table_name='venue')
+    for table in ('artist', 'venue'):
+        op.drop_index(f'ix_{table}_genre_genre_id_{table}_id', table_name=f'{table}_genre')
+        op.drop_table(f'{table}_genre')
+    op.drop_table('genre')
@@ -0,0 +1,44 @@
+"""show counters on venue and artist
+
+Revision ID: fd9e286af71c
+Revises: 2441ef83fc12
+Create Date: 2026-10-18 10:03:17.284530
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fd9e286af71c'
+down_revision = '2441ef83fc12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    current_time = datetime.now()
+
+    for table in ('venue', 'artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('next_show_at', sa.DateTime(), nullable=True))
+        op.create_index(op.f(f'ix_{table}_next_show_at'), table, ['next_show_at'], unique=False)
+
+        # fill the counters of existing rows from the show table
+        op.execute(sa.text(f'''
+            UPDATE {table} SET
+                upcoming_shows_count = (SELECT count(show.id) FROM show WHERE show.{table}_id = {table}.id AND show.start_time > :current_time),
+                past_shows_count = (SELECT count(show.id) FROM show WHERE show.{table}_id = {table}.id AND show.start_time <= :current_time),
+                next_show_at = (SELECT min(show.start_time) FROM show WHERE show.{table}_id = {table}.id AND show.start_time > :current_time)
+        ''').bindparams(current_time=current_time))
+
+
+def downgrade():
+    for table in ('artist', 'venue'):
+        op.drop_index(op.f(f'ix_{table}_next_show_at'), table_name=table)
+        op.drop_column(table, 'next_show_at')
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -1,9 +1,15 @@
 #----------------------------------------------------------------------------#
 # Imports
 #----------------------------------------------------------------------------#
+from datetime import datetime, timedelta
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+
+from routing import RoutingSession
+from choices import STATES, GENRES
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 #----------------------------------------------------------------------------#
 # Models.
@@ -11,6 +17,17 @@ db = SQLAlchemy()
 
 class Venue(db.Model):
     __tablename__ = 'venue'
+    __table_args__ = (
+        # trigram index serving case-insensitive partial name search on postgres
+        db.Index('ix_venue_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        # keyset pagination of the venues page, grouped by area
+        db.Index('ix_venue_city_state_name_id', 'city', 'state', 'name', 'id'),
+        # the same order within one state, for the ?state= filter
+        db.Index('ix_venue_state_city_name_id', 'state', 'city', 'name', 'id'),
+        # the states of the forms, see choices.py
+        db.CheckConstraint(db.column('state').in_(STATES.values), name='ck_venue_state'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     city = db.Column(db.String(120))
@@ -25,9 +42,21 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500), default='')
     website = db.Column(db.String(120), nullable=True)
-    genres = db.Column(db.String(500))
+    genres = db.relationship('Genre', secondary='venue_genre', order_by='Genre.name')
+    # the city/state area of the venue, maintained by areas.py
+    area_id = db.Column(db.Integer, db.ForeignKey('area.id'), nullable=True, index=True)
     shows = db.relationship('Show', backref='venue', lazy='dynamic')
 
+    # show counters maintained by counters.py, so listings never count shows
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    next_show_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    # last write of the row, for incremental exports
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, server_default=db.func.now(), nullable=False, index=True)
+    # bumped by every edit, keys the cached listing tiles (see fragments.py)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+
     def __repr__(self) -> str:
         return f'<Venue id: {self.id}, \
         name: {self.name}, \
@@ -46,13 +75,21 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'artist'
+    __table_args__ = (
+        # trigram index serving case-insensitive partial name search on postgres
+        db.Index('ix_artist_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        # keyset pagination of the artists page
+        db.Index('ix_artist_name_id', 'name', 'id'),
+        # the states of the forms, see choices.py
+        db.CheckConstraint(db.column('state').in_(STATES.values), name='ck_artist_state'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120), nullable=False)
+    genres = db.relationship('Genre', secondary='artist_genre', order_by='Genre.name')
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
 
@@ -62,6 +99,16 @@ class Artist(db.Model):
     seeking_description = db.Column(db.String(500), nullable=True)
     shows = db.relationship('Show', backref="artist", lazy='dynamic')
 
+    # show counters maintained by counters.py, so listings never count shows
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    next_show_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    # last write of the row, for incremental exports
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, server_default=db.func.now(), nullable=False, index=True)
+    # bumped by every edit, keys the cached listing tiles (see fragments.py)
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+
     def __repr__(self) -> str:
         return f'<Artist id: {self.id}, \
         name: {self.name}, \
@@ -75,17 +122,99 @@ class Artist(db.Model):
         seeking_venue: {self.seeking_venue}, \
         seeking_description: {self.seeking_description}>'
 
+
+class Genre(db.Model):
+    __tablename__ = 'genre'
+    __table_args__ = (
+        # the genres of the forms, see choices.py
+        db.CheckConstraint(db.column('name').in_(GENRES.values), name='ck_genre_name'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    def __repr__(self) -> str:
+        return f'<Genre id: {self.id}, name: {self.name}>'
+
+
+class Area(db.Model):
+    # one row per city and state with venues, counting them so the venue
+    # facets read one row per area instead of grouping the venues
+    __tablename__ = 'area'
+    __table_args__ = (
+        db.UniqueConstraint('city', 'state', name='uq_area_city_state'),
+        # facets ordered by state, then city
+        db.Index('ix_area_state_city', 'state', 'city'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    venue_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    def __repr__(self) -> str:
+        return f'<Area id: {self.id}, city: {self.city}, state: {self.state}, venue_count: {self.venue_count}>'
+
+
+# genres of venues and artists, keyed by owner first for the detail pages and
+# the ?genre= filters of the listings, and by genre first for the owners of
+# one genre
+venue_genre = db.Table(
+    'venue_genre',
+    db.Column('venue_id', db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('genre.id'), primary_key=True),
+    db.Index('ix_venue_genre_genre_id_venue_id', 'genre_id', 'venue_id'),
+)
+
+artist_genre = db.Table(
+    'artist_genre',
+    db.Column('artist_id', db.Integer, db.ForeignKey('artist.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('genre.id'), primary_key=True),
+    db.Index('ix_artist_genre_genre_id_artist_id', 'genre_id', 'artist_id'),
+)
+
+# length of shows booked without an explicit end
+DEFAULT_SHOW_DURATION = timedelta(hours=2)
+
+
+def _default_end_time(context):
+    return context.get_current_parameters()['start_time'] + DEFAULT_SHOW_DURATION
+
+
 # TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
 class Show(db.Model):
     __tablename__= 'show'
+    __table_args__ = (
+        # detail pages and show counts filter on one side of the booking and a
+        # start_time range, the other foreign key is covered for index-only scans
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time', postgresql_include=['artist_id']),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time', postgresql_include=['venue_id']),
+        # keyset pagination of the shows page
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+        db.CheckConstraint('end_time > start_time', name='ck_show_end_time_after_start_time'),
+        # a venue or artist is never booked twice at the same time. Other
+        # databases rely on the check in bookings.py
+        ExcludeConstraint(('venue_id', '='), (db.func.tsrange(db.column('start_time'), db.column('end_time')), '&&'),
+                          name='ex_show_venue_id_booking', using='gist').ddl_if(dialect='postgresql'),
+        ExcludeConstraint(('artist_id', '='), (db.func.tsrange(db.column('start_time'), db.column('end_time')), '&&'),
+                          name='ex_show_artist_id_booking', using='gist').ddl_if(dialect='postgresql'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer, db.ForeignKey('artist.id'), nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey('venue.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
+    # shows occupy [start_time, end_time) of their venue and artist
+    end_time = db.Column(db.DateTime, default=_default_end_time, nullable=False)
+    # client supplied key of the booking request, so retries never book twice
+    idempotency_key = db.Column(db.String(64), nullable=True, unique=True, index=True)
+
+    # last write of the row, for incremental exports
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, server_default=db.func.now(), nullable=False, index=True)
 
     def __repr__(self) -> str:
         return f'<Show id: {self.id}, \
         artist_id: {self.artist_id}, \
         venue_id: {self.venue_id}, \
-        start_time: {self.start_time}>'
+        start_time: {self.start_time}, \
+        end_time: {self.end_time}>'
@@ -0,0 +1,179 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import abort, current_app, request, render_template, stream_template
+from sqlalchemy import and_, false, or_, tuple_
+
+#----------------------------------------------------------------------------#
+# Keyset pagination.
+#----------------------------------------------------------------------------#
+
+# one page of rows with the opaque cursors of its neighbours (None at the ends)
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor'])
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, row, order_by):
+    # cursor tokens are urlsafe base64 of the direction and the sort key of
+    # the boundary row, so clients cannot depend on their content
+    key = [getattr(row, column.key) for column in order_by]
+    payload = json.dumps([direction, key], default=lambda value: value.isoformat(), separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, order_by):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, key = json.loads(payload)
+        if direction not in (NEXT, PREVIOUS) or len(key) != len(order_by):
+            raise ValueError(cursor)
+        key = [datetime.fromisoformat(value) if column.type.python_type is datetime and value is not None else value
+               for column, value in zip(order_by, key)]
+    except (binascii.Error, TypeError, ValueError):
+        abort(400)
+    return direction, key
+
+
+# databases whose indexes sort NULLs after every value, the others (sqlite,
+# mysql, mssql) sort them before
+NULLS_LAST_DIALECTS = frozenset(('postgresql', 'oracle'))
+
+
+def _nullable(column):
+    return column.expression.nullable
+
+
+def _nulls_last(query):
+    return query.session.get_bind().dialect.name in NULLS_LAST_DIALECTS
+
+
+def _ordering(order_by, reverse=False):
+    # NULLs sort where the database puts them by default, so the sort index
+    # serves the whole order (an explicit NULLS LAST on sqlite sorts every
+    # group of equal leading keys in a temporary b-tree instead)
+    if reverse:
+        return [column.desc() for column in order_by]
+    return list(order_by)
+
+
+def _seek(order_by, key, reverse=False, nulls_last=True):
+    # condition of the rows after the key in _ordering(order_by), or before it
+    # with reverse, NULLs sorting after (nulls_last) or before every value.
+    # A single row value comparison is a range the sort index seeks to. It
+    # is never true where a column that decides it is NULL, which only
+    # leaves out rows behind the key when the key holds no NULLs and NULLs
+    # sort behind the values in the walking direction (forward on sqlite,
+    # backward on postgres). Otherwise the columns are compared one at a
+    # time, which the index only seeks to on its first column:
+    # (c1 > k1) OR (c1 = k1 AND ((c2 > k2) OR (c2 = k2 AND ...)))
+
+    # whether the NULLs lie ahead of the non-NULL values in the walking direction
+    nulls_ahead = nulls_last != reverse
+    if not any(_nullable(column) for column in order_by) or (not nulls_ahead and None not in key):
+        return tuple_(*order_by) < tuple_(*key) if reverse else tuple_(*order_by) > tuple_(*key)
+
+    condition = None
+    for column, value in reversed(list(zip(order_by, key))):
+        if value is None:
+            beyond = false() if nulls_ahead else column.is_not(None)
+        else:
+            beyond = column < value if reverse else column > value
+            if nulls_ahead and _nullable(column):
+                beyond = or_(beyond, column.is_(None))
+        if condition is None:
+            condition = beyond
+        else:
+            condition = or_(beyond, and_(column.is_(None) if value is None else column == value, condition))
+    return condition
+
+
+def page_size(stream=False):
+    # page size from the per_page argument, capped by MAX_PAGE_SIZE or by
+    # MAX_STREAMED_PAGE_SIZE for streamed pages
+    size = request.args.get('per_page', type=int) or current_app.config['PAGE_SIZE']
+    if stream:
+        return max(1, min(size, current_app.config['MAX_STREAMED_PAGE_SIZE']))
+    return max(1, min(size, current_app.config['MAX_PAGE_SIZE']))
+
+
+class StreamedPage:
+    # page whose rows come from a server-side cursor while the template walks
+    # them, its cursors are filled in as the rows go by so a pager rendered
+    # after the rows still gets them
+
+    def __init__(self, query, order_by, size, has_prev):
+        self.order_by = order_by
+        self.size = size
+        self.has_prev = has_prev
+        self.next_cursor = None
+        self.prev_cursor = None
+        self.items = self._stream(query.yield_per(current_app.config['STREAM_BATCH_SIZE']))
+
+    def _stream(self, rows):
+        last_row = None
+        for count, row in enumerate(rows):
+            if count == self.size:
+                # the extra row only tells that there is a next page
+                self.next_cursor = encode_cursor(NEXT, last_row, self.order_by)
+                break
+            if count == 0 and self.has_prev:
+                self.prev_cursor = encode_cursor(PREVIOUS, row, self.order_by)
+            yield row
+            last_row = row
+
+
+def paginate(query, order_by, cursor=None, size=None, stream=False):
+    # fetch one page of the query ordered by the unique key order_by, seeking
+    # past the cursor row instead of using OFFSET so every page costs the same,
+    # with stream the rows of forward pages are read lazily (see StreamedPage)
+    if size is None:
+        size = page_size(stream)
+
+    direction, key = decode_cursor(cursor, order_by) if cursor else (NEXT, None)
+
+    if direction == NEXT:
+        if key is not None:
+            query = query.filter(_seek(order_by, key, nulls_last=_nulls_last(query)))
+        query = query.order_by(*_ordering(order_by)).limit(size + 1)
+        if stream:
+            return StreamedPage(query, order_by, size, key is not None)
+        rows = query.all()
+    else:
+        query = query.filter(_seek(order_by, key, reverse=True, nulls_last=_nulls_last(query)))
+        rows = query.order_by(*_ordering(order_by, reverse=True)).limit(size + 1).all()
+
+    # the extra row only tells whether there is more in the walking direction
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if direction == PREVIOUS:
+        rows.reverse()
+
+    has_next = has_more if direction == NEXT else True
+    has_prev = has_more if direction == PREVIOUS else key is not None
+
+    next_cursor = encode_cursor(NEXT, rows[-1], order_by) if rows and has_next else None
+    prev_cursor = encode_cursor(PREVIOUS, rows[0], order_by) if rows and has_prev else None
+
+    return Page(rows, next_cursor, prev_cursor)
+
+#----------------------------------------------------------------------------#
+# Listing pages.
+#----------------------------------------------------------------------------#
+
+def paginate_listing(query, order_by):
+    return paginate(query, order_by, request.args.get('cursor'), stream=current_app.config['STREAM_LISTINGS'])
+
+
+def render_listing(template_name_or_list, **context):
+    # listing pages are streamed while their rows are fetched when STREAM_LISTINGS is set
+    if current_app.config['STREAM_LISTINGS']:
+        return current_app.response_class(stream_template(template_name_or_list, **context))
+    return render_template(template_name_or_list, **context)
@@ -0,0 +1,148 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter, deque
+from heapq import nlargest
+from threading import Lock
+
+from flask import g, request, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------------#
+# Fingerprints.
+#----------------------------------------------------------------------------#
+
+# statements differing only in their literals or in the length of their IN
+# lists share a fingerprint
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER_LISTS = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    statement = _LITERALS.sub('?', statement)
+    statement = _PARAMETER_LISTS.sub('(?)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+#----------------------------------------------------------------------------#
+# Profiles.
+#----------------------------------------------------------------------------#
+
+class QueryProfile:
+    # statements of one request with their durations in seconds
+
+    def __init__(self):
+        self.statements = list()
+
+    def record(self, statement, duration):
+        self.statements.append((statement, duration))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.statements)
+
+    def report(self, slowest, repeated):
+        # summary of the profile: the slowest statements and the fingerprints
+        # repeated at least `repeated` times, the usual sign of an N+1 query
+        fingerprints = Counter(fingerprint(statement) for statement, _ in self.statements)
+        return {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'queries': self.count,
+            'db_ms': round(self.duration * 1000, 3),
+            'slowest': [{'ms': round(duration * 1000, 3), 'statement': statement}
+                        for statement, duration in nlargest(slowest, self.statements, key=lambda item: item[1])],
+            'repeated': [{'count': count, 'statement': statement}
+                         for statement, count in fingerprints.most_common() if count >= repeated],
+        }
+
+#----------------------------------------------------------------------------#
+# Profiler.
+#----------------------------------------------------------------------------#
+
+class QueryProfiler:
+    # counts and times the SQL statements of a sample of requests, reporting
+    # them in a Server-Timing header and a structured log line, and keeping
+    # the latest reports for /_debug/queries. Requests not sampled cost one
+    # random() call, statements outside sampled requests one lookup of g.
+    # Statements of streamed responses run after the report and the async
+    # engine queries run on a thread of their own, neither is profiled
+
+    def __init__(self, app=None):
+        self.lock = Lock()
+        self.history = deque()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.sample_rate = app.config['QUERY_PROFILE_SAMPLE_RATE']
+        self.slowest = app.config['QUERY_PROFILE_SLOWEST']
+        self.repeated = app.config['QUERY_PROFILE_REPEATED']
+        self.debug = app.config['QUERY_PROFILE_DEBUG']
+        self.history = deque(maxlen=app.config['QUERY_PROFILE_HISTORY'])
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions['query_profiler'] = self
+
+    def _start(self):
+        # the debug page can ask for any request to be profiled
+        forced = self.debug and request.headers.get('X-Profile-Queries')
+        if forced or (self.sample_rate and random.random() < self.sample_rate):
+            g.query_profile = QueryProfile()
+
+    def _finish(self, response):
+        profile = g.pop('query_profile', None)
+        if profile is None:
+            return response
+
+        timing = f'db;dur={profile.duration * 1000:.3f};desc="{profile.count} queries"'
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        report = profile.report(self.slowest, self.repeated)
+        report['status'] = response.status_code
+        logger.log(logging.WARNING if report['repeated'] else logging.INFO, json.dumps(report))
+        if self.debug:
+            with self.lock:
+                self.history.append(report)
+        return response
+
+    def recent(self):
+        # latest reports, newest first
+        with self.lock:
+            return list(reversed(self.history))
+
+
+def _current_profile():
+    return g.get('query_profile') if has_app_context() else None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(connection, cursor, statement, parameters, context, executemany):
+    if _current_profile() is not None:
+        connection.info['query_started'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(connection, cursor, statement, parameters, context, executemany):
+    started = connection.info.pop('query_started', None)
+    profile = _current_profile()
+    if profile is not None and started is not None:
+        profile.record(statement, time.perf_counter() - started)
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,161 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from itertools import groupby
+from operator import itemgetter
+
+from sqlalchemy import func
+
+from models import db, Venue, Artist, Show
+from serializers import VENUE_COLUMNS, ARTIST_COLUMNS, VENUE_SHOW_COLUMNS, ARTIST_SHOW_COLUMNS
+from genres import genre_filter, genre_names, genre_names_query
+
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+# keyset order of the venues page, grouped by area and unique through the id
+VENUE_LISTING_ORDER = (Venue.city, Venue.state, Venue.name, Venue.id)
+
+
+def venue_listing_query(genre=None, state=None, city=None):
+    # every venue with its number of upcoming shows read from the counters
+    # kept by counters.py, to be ordered by VENUE_LISTING_ORDER. Optionally
+    # only the venues of one genre, state and/or city
+    query = db.session.query(Venue) \
+        .with_entities(Venue.city, Venue.state, Venue.name, Venue.id, Venue.upcoming_shows_count.label('num_upcoming_shows'), Venue.version)
+    if genre:
+        query = query.filter(genre_filter(Venue, genre))
+    if state:
+        query = query.filter(Venue.state == state)
+    if city:
+        query = query.filter(Venue.city == city)
+    return query
+
+
+def venue_areas(rows):
+    # group venue rows ordered by area into one area (city, state) at a time,
+    # so the template consumes the rows in a single pass
+    for (city, state), area_venues in groupby(rows, key=itemgetter(0, 1)):
+        yield {
+            'city': city,
+            'state': state,
+            'venues': [{
+                'id': venue.id,
+                'name': venue.name,
+                'num_upcoming_shows': venue.num_upcoming_shows,
+                'version': venue.version
+            } for venue in area_venues]
+        }
+
+#----------------------------------------------------------------------------#
+# Artists.
+#----------------------------------------------------------------------------#
+
+# keyset order of the artists page
+ARTIST_LISTING_ORDER = (Artist.name, Artist.id)
+
+
+def artist_listing_query(genre=None):
+    query = db.session.query(Artist).with_entities(Artist.id, Artist.name, Artist.version)
+    if genre:
+        query = query.filter(genre_filter(Artist, genre))
+    return query
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+# keyset order of the shows page
+SHOW_LISTING_ORDER = (Show.start_time, Show.id)
+
+
+def show_listing_query():
+    # shows joined with their artist and venue, flattened into tile rows
+    return db.session.query(Show).join(Artist).join(Venue) \
+        .with_entities(Show.id, Show.venue_id, Venue.name.label('venue_name'), Show.artist_id, Artist.name.label('artist_name'), Artist.image_link.label('artist_image_link'), Show.start_time,
+                        Venue.version.label('venue_version'), Artist.version.label('artist_version'))
+
+#----------------------------------------------------------------------------#
+# Details.
+#----------------------------------------------------------------------------#
+
+# the *_query functions build the statements without running them, so the
+# async views (see async_database.py) execute the same queries
+
+def venue_detail_query(venue_id):
+    # the venue row with every column
+    return db.session.query(Venue).with_entities(*VENUE_COLUMNS).filter(Venue.id == venue_id)
+
+
+def venue_detail(venue_id):
+    # the venue row, or None
+    return venue_detail_query(venue_id).first()
+
+
+def venue_genres_query(venue_id):
+    return genre_names_query(Venue, venue_id)
+
+
+def venue_genres(venue_id):
+    return genre_names(Venue, venue_id)
+
+
+def venue_shows(venue_id):
+    # show tiles of the venue with their artist, oldest first
+    return db.session.query(Show).join(Artist) \
+        .with_entities(*VENUE_SHOW_COLUMNS) \
+        .filter(Show.venue_id == venue_id) \
+        .order_by(Show.start_time)
+
+
+def artist_detail_query(artist_id):
+    # the artist row with every column
+    return db.session.query(Artist).with_entities(*ARTIST_COLUMNS).filter(Artist.id == artist_id)
+
+
+def artist_detail(artist_id):
+    # the artist row, or None
+    return artist_detail_query(artist_id).first()
+
+
+def artist_genres_query(artist_id):
+    return genre_names_query(Artist, artist_id)
+
+
+def artist_genres(artist_id):
+    return genre_names(Artist, artist_id)
+
+
+def artist_shows(artist_id):
+    # show tiles of the artist with their venue, oldest first
+    return db.session.query(Show).join(Venue) \
+        .with_entities(*ARTIST_SHOW_COLUMNS) \
+        .filter(Show.artist_id == artist_id) \
+        .order_by(Show.start_time)
+
+#----------------------------------------------------------------------------#
+# Cache boundaries.
+#----------------------------------------------------------------------------#
+
+def next_venue_show_at():
+    # the earliest upcoming show of any venue, when the venue counts change
+    return db.session.query(func.min(Venue.next_show_at)).scalar()
+
+
+def venue_next_show_at(venue_id):
+    return db.session.query(Venue.next_show_at).filter(Venue.id == venue_id).scalar()
+
+
+def artist_next_show_at(artist_id):
+    return db.session.query(Artist.next_show_at).filter(Artist.id == artist_id).scalar()
+
+
+def venue_artist_ids(venue_id):
+    # artists booked at the venue, whose pages list the venue
+    return [artist_id for artist_id, in db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()]
+
+
+def artist_venue_ids(artist_id):
+    # venues the artist is booked at, whose pages list the artist
+    return [venue_id for venue_id, in db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()]
@@ -0,0 +1,130 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import time
+from itertools import count
+from threading import Lock
+
+from flask import current_app, g
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import QueuePool
+
+#----------------------------------------------------------------------------#
+# Replicas.
+#----------------------------------------------------------------------------#
+
+# seconds a postgres replica is behind its primary, 0 when it replayed all it
+# received (an idle primary doesn't make a replica look late)
+REPLICATION_LAG = text('''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+''')
+
+
+class Replica:
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.healthy = True
+        self.lag = 0.0
+        self.checked_at = 0.0
+        self.lock = Lock()
+
+
+class ReplicaRouter:
+    # picks the replica engine serving the reads of a request. Replicas are
+    # checked at most every check_interval seconds and skipped while they are
+    # down or more than max_lag seconds behind, reads then go to the primary
+
+    def __init__(self, engines, selection='round_robin', max_lag=5.0, check_interval=5.0):
+        if selection not in ('round_robin', 'least_connections'):
+            raise ValueError(f'Unknown replica selection {selection!r}')
+        self.replicas = [Replica(engine) for engine in engines]
+        self.selection = selection
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.turns = count()
+
+        for replica in self.replicas:
+            event.listen(replica.engine, 'handle_error', self._handle_error)
+
+    def _check(self, replica):
+        try:
+            with replica.engine.connect() as connection:
+                replica.lag = connection.execute(REPLICATION_LAG).scalar() if connection.dialect.name == 'postgresql' else 0.0
+            replica.healthy = replica.lag <= self.max_lag
+        except DBAPIError:
+            replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    def _is_available(self, replica):
+        # one thread re-checks a replica that is due, the others use the
+        # result of the previous check meanwhile
+        if time.monotonic() - replica.checked_at >= self.check_interval and replica.lock.acquire(blocking=False):
+            try:
+                self._check(replica)
+            finally:
+                replica.lock.release()
+        return replica.healthy
+
+    def _handle_error(self, context):
+        # a replica failing mid-request is skipped until its next check
+        if context.is_disconnect or context.connection is None:
+            for replica in self.replicas:
+                if replica.engine is context.engine:
+                    replica.healthy = False
+                    replica.checked_at = time.monotonic()
+
+    def pick(self):
+        # a replica engine, or None when none is available
+        available = [replica for replica in self.replicas if self._is_available(replica)]
+        if not available:
+            return None
+        if self.selection == 'least_connections':
+            # connections checked out of each replica pool by this process
+            return min(available, key=lambda replica: replica.engine.pool.checkedout() if isinstance(replica.engine.pool, QueuePool) else 0).engine
+        return available[next(self.turns) % len(available)].engine
+
+#----------------------------------------------------------------------------#
+# Session.
+#----------------------------------------------------------------------------#
+
+class RoutingSession(Session):
+    # sends the SELECTs of read-only requests (see database.replica_reads) to
+    # one replica per request. Writes, flushes, locking reads and every
+    # statement of other requests use the primary
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_only') and not self._flushing \
+                and getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None:
+            replica = self._replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self):
+        if 'replica' not in self.info:
+            router = current_app.extensions.get('replicas')
+            self.info['replica'] = router.pick() if router is not None else None
+            if self.info['replica'] is not None:
+                # pages built from replica reads may be up to max_lag stale
+                g.read_staleness = router.max_lag
+        return self.info['replica']
+
+
+# requests that wrote make their client read from the primary for a while,
+# see database.init_database
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _remember_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _remember_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
@@ -0,0 +1,204 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from collections import defaultdict
+from threading import Lock
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from models import db, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# N-gram index.
+#----------------------------------------------------------------------------#
+
+# length of the grams, the same trigrams postgres builds with pg_trgm
+GRAM_SIZE = 3
+
+
+def ngrams(text, size=GRAM_SIZE):
+    # pad every word like pg_trgm does so short words still produce grams
+    grams = set()
+    for word in text.lower().split():
+        padded = f'  {word} '
+        for start in range(len(padded) - size + 1):
+            grams.add(padded[start:start + size])
+    return grams
+
+
+def substring_ngrams(term, size=GRAM_SIZE):
+    # grams that any name containing the term somewhere must also contain,
+    # words are only padded at the boundaries the term itself spells out
+    grams = set()
+    for word in term.lower().split():
+        for start in range(len(word) - size + 1):
+            grams.add(word[start:start + size])
+    return grams
+
+
+def similarity(first, second):
+    # ratio of shared grams, same definition as pg_trgm similarity()
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class NgramIndex:
+    # in-process inverted index from grams to entity ids, used as a portable
+    # fallback on databases without pg_trgm (e.g. sqlite in development)
+
+    def __init__(self, size=GRAM_SIZE):
+        self.size = size
+        self.names = dict()
+        self.grams = dict()
+        self.postings = defaultdict(set)
+
+    def add(self, entity_id, name):
+        self.remove(entity_id)
+        name = (name or '').lower()
+        grams = ngrams(name, self.size)
+        self.names[entity_id] = name
+        self.grams[entity_id] = grams
+        for gram in grams:
+            self.postings[gram].add(entity_id)
+
+    def remove(self, entity_id):
+        self.names.pop(entity_id, None)
+        for gram in self.grams.pop(entity_id, ()):
+            posting = self.postings[gram]
+            posting.discard(entity_id)
+            if not posting:
+                del self.postings[gram]
+
+    def search(self, term):
+        # case-insensitive substring match ranked by gram similarity
+        term = term.lower()
+        required = substring_ngrams(term, self.size)
+
+        if required:
+            # intersect the shortest posting lists first
+            postings = sorted((self.postings.get(gram, set()) for gram in required), key=len)
+            candidates = set.intersection(*postings)
+        else:
+            # term too short to produce grams, check every indexed name
+            candidates = list(self.names)
+
+        term_grams = ngrams(term, self.size)
+        matches = [entity_id for entity_id in candidates if term in self.names[entity_id]]
+        matches.sort(key=lambda entity_id: (-similarity(term_grams, self.grams[entity_id]), self.names[entity_id], entity_id))
+
+        return matches
+
+#----------------------------------------------------------------------------#
+# Fallback indexes.
+#----------------------------------------------------------------------------#
+
+# the shared indexes only hold committed names: the changes a session flushes
+# are kept in its info until its transaction commits (and applied) or ends
+# otherwise (and dropped), see bookings.py
+
+_indexes = {Venue: NgramIndex(), Artist: NgramIndex()}
+_loaded = set()
+_lock = Lock()
+
+
+def _fallback_index(model):
+    # build the index from the table on first use, afterwards it is kept up to
+    # date by the session events below
+    if model not in _loaded:
+        with _lock:
+            if model not in _loaded:
+                index = _indexes[model]
+                for entity_id, name in db.session.query(model).with_entities(model.id, model.name):
+                    index.add(entity_id, name)
+                _loaded.add(model)
+    return _indexes[model]
+
+
+def rebuild_indexes():
+    # drop the fallback indexes so they are reloaded from the database
+    with _lock:
+        for model, index in _indexes.items():
+            _indexes[model] = NgramIndex(index.size)
+        _loaded.clear()
+
+
+def _record_entity(target, name):
+    # name None removes the entity from the index
+    object_session(target).info.setdefault('search_changes', list()).append((type(target), target.id, name))
+
+
+def _index_entity(mapper, connection, target):
+    _record_entity(target, target.name or '')
+
+
+def _unindex_entity(mapper, connection, target):
+    _record_entity(target, None)
+
+
+def _commit_indexes(session):
+    changes = session.info.pop('search_changes', None)
+    if not changes:
+        return
+    with _lock:
+        for model, entity_id, name in changes:
+            if model not in _loaded:
+                continue
+            if name is None:
+                _indexes[model].remove(entity_id)
+            else:
+                _indexes[model].add(entity_id, name)
+
+
+def _discard_changes(session, transaction):
+    # the transaction rolled back or the session closed without committing
+    if transaction.parent is None:
+        session.info.pop('search_changes', None)
+
+
+for _model in _indexes:
+    event.listen(_model, 'after_insert', _index_entity)
+    event.listen(_model, 'after_update', _index_entity)
+    event.listen(_model, 'after_delete', _unindex_entity)
+
+event.listen(Session, 'after_commit', _commit_indexes)
+event.listen(Session, 'after_transaction_end', _discard_changes)
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+def _uses_trigram_index():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def search_by_name(model, search_term):
+    # return (id, name, upcoming_shows_count) rows of the model whose name
+    # contains the search term, case-insensitive and best matches first
+    search_term = search_term.strip()
+    query = db.session.query(model).with_entities(model.id, model.name, model.upcoming_shows_count)
+
+    if _uses_trigram_index():
+        # ILIKE is served by the pg_trgm GIN index on the name column, % and _
+        # in the term match themselves
+        return query.filter(model.name.icontains(search_term, autoescape=True)) \
+            .order_by(func.similarity(model.name, search_term).desc(), model.name, model.id) \
+            .all()
+
+    ranked_ids = _fallback_index(model).search(search_term)
+    if not ranked_ids:
+        return []
+
+    # rows are read back by primary key so entities deleted by another
+    # process since they were indexed are dropped here
+    rows = {row.id: row for row in query.filter(model.id.in_(ranked_ids))}
+    return [rows[entity_id] for entity_id in ranked_ids if entity_id in rows]
+
+
+def search_venues_by_name(search_term):
+    return search_by_name(Venue, search_term)
+
+
+def search_artists_by_name(search_term):
+    return search_by_name(Artist, search_term)
@@ -0,0 +1,97 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from sqlalchemy import Boolean
+from sqlalchemy.inspection import inspect
+from werkzeug.exceptions import BadRequest
+
+from models import Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Column lists.
+#----------------------------------------------------------------------------#
+
+# everything below is built once at import so views never inspect the models
+
+VENUE_COLUMNS = tuple(inspect(Venue).c)
+ARTIST_COLUMNS = tuple(inspect(Artist).c)
+SHOW_COLUMNS = tuple(inspect(Show).c)
+
+# columns maintained by the database, the handlers, counters.py and areas.py, never read from forms
+COMPUTED_COLUMNS = frozenset(('id', 'upcoming_shows_count', 'past_shows_count', 'next_show_at', 'updated_at', 'area_id', 'version'))
+
+VENUE_FORM_COLUMNS = tuple(column for column in VENUE_COLUMNS if column.name not in COMPUTED_COLUMNS)
+ARTIST_FORM_COLUMNS = tuple(column for column in ARTIST_COLUMNS if column.name not in COMPUTED_COLUMNS)
+
+# fields the forms require (DataRequired in forms.py), submissions without
+# them are rejected before anything is written
+VENUE_REQUIRED_FIELDS = frozenset(('name', 'city', 'state', 'address'))
+ARTIST_REQUIRED_FIELDS = frozenset(('name', 'city', 'state'))
+
+# multi-valued form fields, stored in association tables by genres.py
+LIST_FIELDS = frozenset(('genres',))
+BOOLEAN_FIELDS = frozenset(column.name for column in VENUE_COLUMNS + ARTIST_COLUMNS if isinstance(column.type, Boolean))
+
+#----------------------------------------------------------------------------#
+# Show tiles.
+#----------------------------------------------------------------------------#
+
+# show columns of the detail pages, labelled with the artist_/venue_ prefixes
+# the templates expect so rows map to tile dicts without renaming
+VENUE_SHOW_COLUMNS = (
+    Show.artist_id,
+    Artist.name.label('artist_name'),
+    Artist.image_link.label('artist_image_link'),
+    Show.start_time,
+)
+ARTIST_SHOW_COLUMNS = (
+    Show.venue_id,
+    Venue.name.label('venue_name'),
+    Venue.image_link.label('venue_image_link'),
+    Show.start_time,
+)
+
+#----------------------------------------------------------------------------#
+# Serializers.
+#----------------------------------------------------------------------------#
+
+def row_to_dict(row):
+    return dict(row._mapping)
+
+
+def rows_to_dicts(rows):
+    # rows of one query share their keys, zip each tuple with them
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return []
+    keys = first_row._fields
+    return [dict(zip(keys, first_row))] + [dict(zip(keys, row)) for row in rows]
+
+
+def split_shows(rows, current_time):
+    # one pass over show rows, returning (past_shows, upcoming_shows) dicts
+    past_shows = list()
+    upcoming_shows = list()
+    for row in rows:
+        show = dict(row._mapping)
+        if show['start_time'] > current_time:
+            upcoming_shows.append(show)
+        else:
+            past_shows.append(show)
+    return past_shows, upcoming_shows
+
+
+def form_to_columns(form, columns, required=frozenset()):
+    # read the submitted values of the given model columns from a form,
+    # a missing or empty required field is a 400 Bad Request
+    data = dict()
+    for column in columns:
+        name = column.name
+        if name in required and not form.get(name):
+            raise BadRequest(f'The {name} field is required.')
+        if name in BOOLEAN_FIELDS:
+            data[name] = bool(form.get(name))
+        else:
+            data[name] = form.get(name)
+    return data
@@ -0,0 +1,111 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from datetime import timedelta
+
+import click
+from flask import Blueprint, render_template, request, flash
+
+from models import db
+from queries import show_listing_query, SHOW_LISTING_ORDER
+from serializers import row_to_dict
+from pagination import paginate_listing, render_listing
+from cache import cache
+from counters import roll_over_shows, check_show_counters
+from bookings import BookingConflict, IdempotencyKeyReused, reserve_show
+from database import replica_reads
+
+blueprint = Blueprint('shows', __name__, cli_group=None)
+
+#----------------------------------------------------------------------------#
+# Cache invalidation.
+#----------------------------------------------------------------------------#
+
+def invalidate_show(artist_id, venue_id):
+  # the pages listing the show and the venue upcoming counts
+  cache.invalidate('venues', 'shows', f'venue:{venue_id}', f'artist:{artist_id}')
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@blueprint.route('/shows')
+@replica_reads
+@cache.cached('shows')
+def shows():
+  # displays list of shows at /shows
+  # TODO: replace with real venues data.
+  #       num_shows should be aggregated based on number of upcoming shows per venue.
+
+  # perform joins on show table with other tables to get info about one page of shows
+  page = paginate_listing(show_listing_query(), SHOW_LISTING_ORDER)
+
+  # map retrieved shows info from ORM rows lazily, so streamed pages never hold the list
+  data = (row_to_dict(show) for show in page.items)
+
+  return render_listing('pages/shows.html', shows=data, page=page)
+
+@blueprint.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  from forms import ShowForm
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@blueprint.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # TODO: insert form data as a new Show record in the db, instead
+
+  # dateutil is imported by the first submission rather than at startup
+  import dateutil.parser
+
+  try:
+    # assign submitted values to attributes
+    form_data = dict()
+    form_data['artist_id'] = int(request.form['artist_id'])
+    form_data['venue_id'] = int(request.form['venue_id'])
+    form_data['start_time'] = dateutil.parser.parse(request.form['start_time'])
+    form_data['duration'] = timedelta(minutes=request.form.get('duration', 120, type=int))
+    form_data['idempotency_key'] = request.form.get('idempotency_key') or request.headers.get('Idempotency-Key')
+
+    # book the show in its own transaction unless its venue or artist is already booked at that time,
+    # a resubmitted form returns the show of the first submission
+    show, created = reserve_show(**form_data)
+    if created:
+      invalidate_show(form_data['artist_id'], form_data['venue_id'])
+    flash('Show was successfully listed!')
+  except (BookingConflict, IdempotencyKeyReused) as conflict:
+    db.session.rollback()
+    flash(f'Show could not be listed. {conflict}')
+  except Exception as error:
+    # rollback pending changes on error
+    db.session.rollback()
+    flash('An error occurred. Show could not be listed.')
+
+  finally:
+    # close curent session
+    db.session.close()
+
+  return render_template('pages/home.html')
+
+#  Show counters
+#  ----------------------------------------------------------------
+
+@blueprint.cli.command('rollover-shows')
+def rollover_shows_command():
+  # move started shows from upcoming to past counters, run it periodically (e.g. from cron)
+  rolled_over = roll_over_shows()
+  for table, count in rolled_over.items():
+    print(f'{table}: {count} rows rolled over')
+
+@blueprint.cli.command('check-counters')
+@click.option('--repair', is_flag=True, help='Rebuild the counters that are out of date.')
+def check_counters_command(repair):
+  # compare the venue and artist show counters against the show table
+  stale = check_show_counters(repair=repair)
+  for table, ids in stale.items():
+    print(f'{table}: {len(ids)} stale rows {ids}')
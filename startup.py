@@ -0,0 +1,60 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import subprocess
+import sys
+from collections import Counter
+from statistics import median
+
+#----------------------------------------------------------------------------#
+# Startup benchmark.
+#----------------------------------------------------------------------------#
+
+# the startup of a worker: a fresh interpreter importing app.py and calling
+# create_app(), under python -X importtime which reports the time spent
+# importing every module on stderr
+STARTUP = '''
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+print(imported - started, time.perf_counter() - imported)
+'''
+
+
+def parse_importtime(output):
+    # (module, self microseconds) of every module in -X importtime output,
+    # whose lines read 'import time: <self> | <cumulative> | <module>'
+    modules = list()
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_time, _, module = line[len('import time:'):].split('|')
+        if self_time.strip().isdigit():
+            modules.append((module.strip(), int(self_time)))
+    return modules
+
+
+def measure_startup(directory, runs=5):
+    # median import and create_app() times in milliseconds over the runs,
+    # and the median import time of every top-level package
+    import_times, create_times, packages = list(), list(), dict()
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP],
+                                cwd=directory, capture_output=True, text=True, check=True)
+        import_time, create_time = map(float, result.stdout.split()[-2:])
+        import_times.append(import_time * 1000)
+        create_times.append(create_time * 1000)
+
+        package_times = Counter()
+        for module, self_time in parse_importtime(result.stderr):
+            package_times[module.split('.')[0]] += self_time / 1000
+        for package, milliseconds in package_times.items():
+            packages.setdefault(package, list()).append(milliseconds)
+
+    return {
+        'import_ms': median(import_times),
+        'create_app_ms': median(create_times),
+        'packages': {package: median(times) for package, times in packages.items()},
+    }
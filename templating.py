@@ -0,0 +1,50 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+#----------------------------------------------------------------------------#
+# Compiled templates.
+#----------------------------------------------------------------------------#
+
+# templates compiled by one process (or by the compile-templates command at
+# deploy time) are stored as bytecode in TEMPLATE_CACHE_DIR, so new workers
+# load them instead of compiling them on their first requests. A template
+# whose source changed is compiled again, its checksum is in the bytecode
+
+
+def init_templates(app):
+    # must run before the first use of app.jinja_env, which reads the options
+    directory = app.config['TEMPLATE_CACHE_DIR']
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(directory)}
+
+
+def template_names(app):
+    return app.jinja_env.list_templates(extensions=['html'])
+
+
+def preload_templates(app):
+    # load every template into the template cache of the worker at startup
+    for name in template_names(app):
+        app.jinja_env.get_template(name)
+
+
+def compile_templates(app):
+    # compile every template into the bytecode cache from scratch, returning
+    # the names of the compiled templates
+    environment = app.jinja_env
+    if environment.bytecode_cache is None:
+        raise RuntimeError('Set TEMPLATE_CACHE_DIR to compile the templates.')
+    environment.bytecode_cache.clear()
+
+    # an environment without a template cache of its own compiles every
+    # template again instead of reusing the loaded ones
+    compiler = environment.overlay(cache_size=0)
+    names = template_names(app)
+    for name in names:
+        compiler.get_template(name)
+    return names
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+# the modules of the app live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Venue, Artist
+from search import rebuild_indexes
+from bookings import rebuild_booking_indexes
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # the app on an empty sqlite database of its own, logging to the error.log
+    # of its directory
+    monkeypatch.chdir(tmp_path)
+    app = create_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/fyyur.db', SECRET_KEY='test',
+                     CACHE_TYPE='null', TEMPLATE_PRELOAD=False, QUERY_PROFILE_SAMPLE_RATE=0,
+                     WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+    # the fallback indexes are shared by the apps of the process
+    rebuild_indexes()
+    rebuild_booking_indexes()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def entities(app):
+    # a venue and an artist to book, as (artist_id, venue_id)
+    with app.app_context():
+        venue = Venue(name='The Musical Hop', city='San Francisco', state='CA')
+        artist = Artist(name='Guns N Petals', city='San Francisco', state='CA')
+        db.session.add_all([venue, artist])
+        db.session.commit()
+        return artist.id, venue.id
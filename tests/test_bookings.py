@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from collections import defaultdict
+from queue import Queue, Empty
+from threading import Thread
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import bookings
+from models import db, Venue, Artist, Show
+from bookings import BookingConflict, IdempotencyKeyReused, book_show, reserve_show
+
+START = datetime(2030, 1, 1, 20)
+
+
+def test_conflict_with_committed_show(app, entities):
+    artist_id, venue_id = entities
+    with app.app_context():
+        book_show(artist_id, venue_id, START)
+        db.session.commit()
+    with app.app_context():
+        with pytest.raises(BookingConflict):
+            book_show(artist_id, venue_id, START + timedelta(minutes=30))
+        book_show(artist_id, venue_id, START + timedelta(hours=2))
+
+
+def test_conflict_with_uncommitted_show_of_the_session(app, entities):
+    artist_id, venue_id = entities
+    with app.app_context():
+        book_show(artist_id, venue_id, START)
+        with pytest.raises(BookingConflict):
+            book_show(artist_id, venue_id, START)
+
+
+def test_rolled_back_show_while_another_session_commits(app, entities):
+    artist_id, venue_id = entities
+    with app.app_context():
+        book_show(artist_id, venue_id, START)
+        # another request commits while the booking is still uncommitted
+        with app.app_context():
+            db.session.get(Venue, venue_id)
+            db.session.commit()
+        db.session.rollback()
+
+    with app.app_context():
+        book_show(artist_id, venue_id, START)
+        db.session.commit()
+
+
+def _shows(app):
+    with app.app_context():
+        return db.session.query(Show).count()
+
+
+def test_replayed_idempotency_key(app, client, entities):
+    artist_id, venue_id = entities
+    form = {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': '2030-01-01 20:00:00', 'idempotency_key': 'a1'}
+    for _ in range(2):
+        assert 'Show was successfully listed!' in client.post('/shows/create', data=form).text
+    assert _shows(app) == 1
+
+    with app.app_context():
+        show, created = reserve_show(artist_id, venue_id, START, idempotency_key='a1')
+        assert not created
+        with pytest.raises(IdempotencyKeyReused):
+            reserve_show(artist_id, venue_id, START + timedelta(days=1), idempotency_key='a1')
+    assert _shows(app) == 1
+
+
+def test_concurrent_retries_book_once(app, entities):
+    artist_id, venue_id = entities
+    results = []
+
+    def submit():
+        with app.app_context():
+            show, created = reserve_show(artist_id, venue_id, START, idempotency_key='a1')
+            results.append((show.id, created))
+
+    threads = [Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({show_id for show_id, created in results}) == 1
+    assert sorted(created for show_id, created in results) == [False] * 7 + [True]
+    assert _shows(app) == 1
+
+
+def _overlaps(intervals):
+    # the neighbouring [start, end) intervals that overlap, once sorted
+    intervals = sorted(intervals)
+    return [(first, second) for first, second in zip(intervals, intervals[1:]) if second[0] < first[1]]
+
+
+def test_concurrent_bookings_never_overlap(app):
+    # hundreds of reservations with distinct keys, each sent twice, over half
+    # hourly slots of two hour shows of a few venues and artists from many threads
+    app.config['BOOKING_BACKOFF'] = 0.001
+    with app.app_context():
+        venues = [Venue(name=f'Venue {number}', city='San Francisco', state='CA') for number in range(3)]
+        artists = [Artist(name=f'Artist {number}', city='San Francisco', state='CA') for number in range(3)]
+        db.session.add_all(venues + artists)
+        db.session.commit()
+        venue_ids = [venue.id for venue in venues]
+        artist_ids = [artist.id for artist in artists]
+
+    requests = Queue()
+    for number in range(300):
+        request = (artist_ids[number // 3 % 3], venue_ids[number % 3],
+                   START + timedelta(minutes=30 * (number % 40)), f'key-{number}')
+        requests.put(request)
+        requests.put(request)
+    booked = defaultdict(set)
+    conflicts = []
+    errors = []
+
+    def submit():
+        with app.app_context():
+            while True:
+                try:
+                    artist_id, venue_id, start_time, key = requests.get_nowait()
+                except Empty:
+                    return
+                try:
+                    show, created = reserve_show(artist_id, venue_id, start_time, idempotency_key=key)
+                    booked[key].add(show.id)
+                except BookingConflict:
+                    conflicts.append(key)
+                except Exception as error:
+                    errors.append(error)
+
+    threads = [Thread(target=submit) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    # a replayed key gets the show of its first request back
+    assert all(len(show_ids) == 1 for show_ids in booked.values())
+    assert booked and conflicts
+
+    with app.app_context():
+        shows = db.session.query(Show).with_entities(
+            Show.venue_id, Show.artist_id, Show.start_time, Show.end_time, Show.idempotency_key).all()
+    keys = [show.idempotency_key for show in shows]
+    assert len(keys) == len(set(keys)) == len(booked)
+    for column in ('venue_id', 'artist_id'):
+        intervals = defaultdict(list)
+        for show in shows:
+            intervals[getattr(show, column)].append((show.start_time, show.end_time))
+        assert all(_overlaps(entity_intervals) == [] for entity_intervals in intervals.values())
+
+
+def test_locked_database_is_retried(app, entities, monkeypatch):
+    artist_id, venue_id = entities
+    app.config['BOOKING_BACKOFF'] = 0
+    failures = [OperationalError('INSERT', {}, Exception('database is locked'))]
+
+    def locked_book_show(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return book_show(*args, **kwargs)
+
+    monkeypatch.setattr(bookings, 'book_show', locked_book_show)
+    with app.app_context():
+        show, created = reserve_show(artist_id, venue_id, START, idempotency_key='a1')
+        assert created
+    assert _shows(app) == 1
+
+    app.config['BOOKING_ATTEMPTS'] = 2
+    failures.extend([OperationalError('INSERT', {}, Exception('database is locked'))] * 2)
+    with app.app_context():
+        with pytest.raises(OperationalError):
+            reserve_show(artist_id, venue_id, START + timedelta(days=1))
+    assert _shows(app) == 1
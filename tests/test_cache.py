@@ -0,0 +1,46 @@
+import pytest
+from flask import Flask
+
+from cache import Cache
+
+
+@pytest.fixture(params=['memory', 'file'])
+def app(request, tmp_path):
+    app = Flask(__name__)
+    app.config.update(CACHE_TYPE=request.param, CACHE_DIR=str(tmp_path),
+                      CACHE_MAX_ENTRIES=3, CACHE_DEFAULT_TIMEOUT=300)
+    app.cache = Cache(app)
+    app.renders = dict()
+
+    @app.route('/venues/<int:venue_id>')
+    @app.cache.cached('venue:{venue_id}')
+    def show_venue(venue_id):
+        app.renders[venue_id] = app.renders.get(venue_id, 0) + 1
+        return f'venue {venue_id} render {app.renders[venue_id]}'
+
+    return app
+
+
+def test_invalidate_after_eviction(app):
+    client = app.test_client()
+    assert client.get('/venues/1').text == 'venue 1 render 1'
+    app.cache.invalidate('venue:1')
+    app.cache.invalidate('venue:1')
+    assert client.get('/venues/1').text == 'venue 1 render 2'
+
+    # fill the cache past CACHE_MAX_ENTRIES, evicting every cached page
+    for venue_id in range(2, 10):
+        client.get(f'/venues/{venue_id}')
+    for index in range(10):
+        app.cache.backend.set(f'filler:{index}', index, None)
+
+    # the version keeps counting instead of restarting at 1
+    app.cache.invalidate('venue:1')
+    assert app.cache._versions(['venue:1']) == [3]
+    assert client.get('/venues/1').text == 'venue 1 render 3'
+
+
+def test_cached_page_is_served(app):
+    client = app.test_client()
+    assert client.get('/venues/1').text == 'venue 1 render 1'
+    assert client.get('/venues/1').text == 'venue 1 render 1'
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from models import db, Venue, Artist, Show
+from counters import check_show_counters, _recomputed_counters
+from queries import venue_shows, artist_shows
+
+
+def _counters(model, entity_id):
+    entity = db.session.get(model, entity_id)
+    return entity.upcoming_shows_count, entity.past_shows_count, entity.next_show_at
+
+
+def test_counters_follow_created_and_deleted_shows(app, entities):
+    artist_id, venue_id = entities
+    now = datetime.now().replace(microsecond=0)
+    starts = [now - timedelta(days=3), now + timedelta(days=2), now + timedelta(days=5)]
+    with app.app_context():
+        shows = [Show(artist_id=artist_id, venue_id=venue_id, start_time=start) for start in starts]
+        db.session.add_all(shows)
+        db.session.commit()
+        show_ids = [show.id for show in shows]
+        for model, entity_id in ((Venue, venue_id), (Artist, artist_id)):
+            assert _counters(model, entity_id) == (2, 1, starts[1])
+        assert check_show_counters() == {'venue': [], 'artist': []}
+
+    with app.app_context():
+        # deleting the next show makes the following one next
+        db.session.delete(db.session.get(Show, show_ids[1]))
+        db.session.delete(db.session.get(Show, show_ids[0]))
+        db.session.commit()
+        for model, entity_id in ((Venue, venue_id), (Artist, artist_id)):
+            assert _counters(model, entity_id) == (1, 0, starts[2])
+        assert check_show_counters() == {'venue': [], 'artist': []}
+
+
+def _plan(statement):
+    statement = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    return ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')))
+
+
+def test_show_queries_use_the_start_time_indexes(app, entities):
+    artist_id, venue_id = entities
+    with app.app_context():
+        for query, index in ((venue_shows(venue_id), 'ix_show_venue_id_start_time'),
+                             (artist_shows(artist_id), 'ix_show_artist_id_start_time')):
+            assert f'USING INDEX {index}' in _plan(query.statement)
+
+
+def test_recomputed_counters_use_the_start_time_indexes(app, entities):
+    # the upcoming and past counts and the next show of a row, as the roll
+    # over and the counter checks recompute them, each one range of an index
+    with app.app_context():
+        for model, entity_id, index in ((Venue, entities[1], 'ix_show_venue_id_start_time'),
+                                        (Artist, entities[0], 'ix_show_artist_id_start_time')):
+            counters = _recomputed_counters(model, datetime.now())
+            plan = _plan(select(model.id, *counters.values()).where(model.id == entity_id))
+            assert plan.count(f'INDEX {index} (') == len(counters)
+            assert 'SCAN show' not in plan
@@ -0,0 +1,44 @@
+from sqlalchemy import create_engine, text
+
+from models import db
+from database import instrument_pool, pool_metrics, engine_options
+
+
+def test_pools_keep_metrics_of_their_own(app, tmp_path):
+    with app.app_context():
+        replica = create_engine(f'sqlite:///{tmp_path}/replica.db', **engine_options(app.config))
+        instrument_pool(replica)
+        for _ in range(3):
+            with db.engine.connect() as connection:
+                connection.execute(text('select 1'))
+
+        primary_metrics = pool_metrics(db.engine)
+        assert primary_metrics['checkouts'] >= 3
+        assert pool_metrics(replica)['checkouts'] == 0
+
+        with replica.connect() as connection:
+            connection.execute(text('select 1'))
+        assert pool_metrics(replica)['checkouts'] == 1
+        assert pool_metrics(replica)['connects'] == 1
+        assert pool_metrics(db.engine)['checkouts'] == primary_metrics['checkouts']
+
+
+def test_metrics_survive_dispose(app):
+    with app.app_context():
+        with db.engine.connect() as connection:
+            connection.execute(text('select 1'))
+        checkouts = pool_metrics(db.engine)['checkouts']
+        db.engine.dispose()
+        with db.engine.connect() as connection:
+            connection.execute(text('select 1'))
+        assert pool_metrics(db.engine)['checkouts'] == checkouts + 1
+
+
+def test_metrics_view_lists_the_replicas(tmp_path, monkeypatch):
+    from app import create_app
+    monkeypatch.chdir(tmp_path)
+    app = create_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/primary.db', SECRET_KEY='test',
+                     SQLALCHEMY_REPLICA_URIS=[f'sqlite:///{tmp_path}/replica.db'], CACHE_TYPE='null', QUERY_PROFILE_SAMPLE_RATE=0)
+    metrics = app.test_client().get('/_metrics/pool').json
+    assert metrics['url'].endswith('primary.db')
+    assert [replica['url'] for replica in metrics['replicas']] == [f'sqlite:///{tmp_path}/replica.db']
@@ -0,0 +1,85 @@
+import io
+import json
+
+from models import db, Venue, Show
+from importer import importer_for, read_records
+
+VENUE = {'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA', 'address': '1015 Folsom Street',
+         'facebook_link': 'https://www.facebook.com/TheMusicalHop', 'genres': ['Jazz', 'Reggae']}
+
+
+def _import(kind, lines, chunk_size=100):
+    records = read_records(io.StringIO(''.join(line + '\n' for line in lines)), 'ndjson')
+    return importer_for(kind).run(records, chunk_size)
+
+
+def test_venues_are_validated_like_the_form(app):
+    lines = [json.dumps(VENUE),
+             json.dumps({**VENUE, 'name': ' '}),
+             json.dumps({**VENUE, 'state': 'XX'}),
+             json.dumps({**VENUE, 'facebook_link': 'facebook'}),
+             json.dumps({**VENUE, 'genres': ['Jazz', 'Polka']}),
+             json.dumps({**VENUE, 'city': 'x' * 121}),
+             json.dumps({**VENUE, 'name': 'Park Square Live Music & Coffee', 'genres': 'Folk,Jazz'})]
+    with app.app_context():
+        report = _import('venues', lines)
+        assert report['imported'] == 2
+        assert report['error'] is None
+        assert [error['record'] for error in report['errors']] == [2, 3, 4, 5, 6]
+        assert report['errors'][0]['errors'] == {'name': ['This field is required.']}
+        assert report['errors'][1]['errors'] == {'state': ['Not a valid choice.']}
+        assert report['errors'][2]['errors'] == {'facebook_link': ['Invalid URL.']}
+        assert report['errors'][3]['errors'] == {'genres': ["'Polka' is not a valid choice for this field."]}
+        assert report['errors'][4]['errors'] == {'city': ['Field cannot be longer than 120 characters.']}
+        assert sorted(db.session.scalars(db.select(Venue.name))) == ['Park Square Live Music & Coffee', 'The Musical Hop']
+
+
+def test_malformed_lines_are_row_errors(app):
+    lines = [json.dumps(VENUE), '{"name": "The Dueling', '', '["The Musical Hop"]', json.dumps({**VENUE, 'name': 'Park Square'})]
+    with app.app_context():
+        report = _import('venues', lines)
+        assert report['imported'] == 2
+        assert [error['record'] for error in report['errors']] == [2, 4]
+        assert report['errors'][0]['errors']['record'][0].startswith('Not valid JSON')
+        assert report['errors'][1]['errors'] == {'record': ['Not a JSON object.']}
+
+
+def test_shows_are_validated_and_checked_for_bookings(app):
+    with app.app_context():
+        _import('venues', [json.dumps(VENUE)])
+        _import('artists', [json.dumps({'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA',
+                                        'facebook_link': 'https://www.facebook.com/GunsNPetals', 'genres': ['Rock n Roll']})])
+        lines = [json.dumps({'artist_id': 1, 'venue_id': 1, 'start_time': '2030-05-21 21:30:00'}),
+                 json.dumps({'artist_id': 1, 'venue_id': 1, 'start_time': '2030-05-21T22:00:00', 'duration': 60}),
+                 json.dumps({'artist_id': 'one', 'venue_id': 1, 'start_time': '2030-05-22 21:30:00'}),
+                 json.dumps({'artist_id': 1, 'venue_id': 1, 'start_time': 'tomorrow night'}),
+                 json.dumps({'artist_id': 1, 'venue_id': 1, 'start_time': '2030-05-23 21:30:00', 'duration': 0}),
+                 json.dumps({'artist_id': 1, 'venue_id': 2, 'start_time': '2030-05-23 21:30:00'}),
+                 json.dumps({'artist_id': 1, 'venue_id': 1, 'start_time': '2030-05-24 21:30:00', 'duration': '90'})]
+        report = _import('shows', lines)
+        assert report['imported'] == 2
+        assert {error['record']: list(error['errors']) for error in report['errors']} == {
+            2: ['venue_id', 'artist_id'], 3: ['artist_id'], 4: ['start_time'], 5: ['duration'], 6: ['venue_id']}
+        assert db.session.query(Show).count() == 2
+
+
+def test_failed_write_returns_the_partial_report(app, monkeypatch):
+    lines = [json.dumps({**VENUE, 'name': f'Venue {number}'}) for number in range(5)]
+    with app.app_context():
+        importer = importer_for('venues')
+        write = importer.write
+        calls = list()
+
+        def failing_write(rows):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise RuntimeError('disk full')
+            write(rows)
+
+        monkeypatch.setattr(importer, 'write', failing_write)
+        checkpoints = list()
+        report = importer.run(read_records(io.StringIO('\n'.join(lines)), 'ndjson'), 2, on_chunk=checkpoints.append)
+        assert report['imported'] == 2
+        assert report['error'] == {'records': [3, 4], 'message': 'disk full'}
+        assert checkpoints == [2]
+        assert db.session.query(Venue).count() == 2
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import genres
+from models import db, Venue, Artist, Show
+from queries import VENUE_LISTING_ORDER, venue_listing_query, venue_areas
+
+
+def _add_catalog(app, count):
+    # venues spread over areas, each with an artist and an upcoming show
+    with app.app_context():
+        for number in range(count):
+            venue = Venue(name=f'Venue {number}', city=f'City {number % 3}', state='CA')
+            artist = Artist(name=f'Artist {number}', city='San Francisco', state='CA')
+            db.session.add_all([venue, artist])
+            db.session.flush()
+            db.session.add(Show(venue_id=venue.id, artist_id=artist.id,
+                                start_time=datetime.now() + timedelta(days=number + 1)))
+        db.session.commit()
+
+
+def _statements(app, client, path):
+    # the statements a request to the path runs
+    statements = []
+
+    def count(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        assert client.get(path).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return len(statements)
+
+
+@pytest.mark.parametrize('path', ['/venues', '/artists', '/shows'])
+def test_listing_queries_do_not_grow_with_the_catalog(app, client, path):
+    _add_catalog(app, 2)
+    few = _statements(app, client, path)
+    _add_catalog(app, 12)
+    assert _statements(app, client, path) == few
+
+
+def test_venue_areas_hold_upcoming_show_counts(app):
+    _add_catalog(app, 4)
+    with app.app_context():
+        rows = venue_listing_query().order_by(*VENUE_LISTING_ORDER)
+        areas = list(venue_areas(rows))
+    assert [(area['city'], len(area['venues'])) for area in areas] == [('City 0', 2), ('City 1', 1), ('City 2', 1)]
+    assert all(venue['num_upcoming_shows'] == 1 for area in areas for venue in area['venues'])
+
+
+@pytest.mark.parametrize('selective_links', [0, genres.GENRE_SELECTIVE_LINKS])
+def test_genre_and_state_filters(app, client, monkeypatch, selective_links):
+    # genres with more links than GENRE_SELECTIVE_LINKS are probed per row
+    monkeypatch.setattr(genres, 'GENRE_SELECTIVE_LINKS', selective_links)
+    for venue in ({'name': 'The Musical Hop', 'state': 'CA', 'genres': ['Jazz', 'Folk']},
+                  {'name': 'The Dueling Pianos Bar', 'state': 'NY', 'genres': ['Jazz']},
+                  {'name': 'Park Square Live Music', 'state': 'CA', 'genres': ['Folk']}):
+        client.post('/venues/create', data={'city': 'San Francisco', 'address': '1015 Folsom Street', **venue})
+    response = client.get('/api/v1/venues?genre=Jazz&state=CA')
+    assert [venue['name'] for venue in response.json['data']] == ['The Musical Hop']
+    response = client.get('/api/v1/venues?genre=Folk')
+    assert sorted(venue['name'] for venue in response.json['data']) == ['Park Square Live Music', 'The Musical Hop']
@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import event
+
+import pagination
+from models import db, Venue, Artist
+from pagination import paginate
+from queries import venue_listing_query, artist_listing_query, VENUE_LISTING_ORDER, ARTIST_LISTING_ORDER
+
+
+def _walk(query, order_by, size):
+    # ids of every page walking forward, then back from the last page
+    forward, cursor = list(), None
+    while True:
+        page = paginate(query, order_by, cursor, size)
+        forward.append([row.id for row in page.items])
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    backward, cursor = [forward[-1]], page.prev_cursor
+    while cursor is not None:
+        page = paginate(query, order_by, cursor, size)
+        backward.insert(0, [row.id for row in page.items])
+        cursor = page.prev_cursor
+    return forward, backward
+
+
+def _null_key(nulls_last):
+    def key(value):
+        return (value is None if nulls_last else value is not None, value or '')
+    return key
+
+
+@pytest.fixture(params=[False, True], ids=['nulls first', 'nulls last'])
+def nulls_last(request, monkeypatch):
+    # sqlite sorts NULLs before every value, postgres after them. The
+    # postgres placement is ordered explicitly on sqlite
+    if request.param:
+        monkeypatch.setattr(pagination, '_nulls_last', lambda query: True)
+        monkeypatch.setattr(pagination, '_ordering', lambda order_by, reverse=False: [
+            column.desc().nulls_first() if reverse else column.asc().nulls_last() for column in order_by])
+    return request.param
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 50])
+def test_venues_with_null_sort_keys(app, size, nulls_last):
+    areas = [('San Francisco', 'CA'), (None, 'CA'), ('New York', None), (None, None)]
+    with app.test_request_context():
+        for index in range(12):
+            city, state = areas[index % 4]
+            name = None if index % 3 == 0 else f'Venue {index % 5}'
+            db.session.add(Venue(name=name, city=city, state=state))
+        db.session.commit()
+
+        venues = db.session.query(Venue).all()
+        null_key = _null_key(nulls_last)
+        expected = [venue.id for venue in sorted(venues, key=lambda venue: (
+            null_key(venue.city), null_key(venue.state), null_key(venue.name), venue.id))]
+
+        forward, backward = _walk(venue_listing_query(), VENUE_LISTING_ORDER, size)
+        assert sum(forward, []) == expected
+        assert backward == forward
+
+
+def test_artists_with_null_names(app, nulls_last):
+    with app.test_request_context():
+        db.session.add_all([Artist(name=name, city='San Francisco', state='CA')
+                            for name in (None, 'Guns N Petals', None, 'Matt Quevedo', 'Guns N Petals')])
+        db.session.commit()
+
+        forward, backward = _walk(artist_listing_query(), ARTIST_LISTING_ORDER, 2)
+        assert forward == ([[2, 5], [4, 1], [3]] if nulls_last else [[1, 3], [2, 5], [4]])
+        assert backward == forward
+
+
+def test_cursor_pages_seek_the_listing_index(app):
+    # a page after a cursor without NULLs seeks to it instead of scanning
+    # the index from its first row
+    with app.test_request_context():
+        db.session.add_all([Venue(name=f'Venue {index}', city='San Francisco', state='CA') for index in range(6)])
+        db.session.commit()
+        cursor = paginate(venue_listing_query(), VENUE_LISTING_ORDER, None, 2).next_cursor
+
+        statements = []
+
+        def listener(connection, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            page = paginate(venue_listing_query(), VENUE_LISTING_ORDER, cursor, 2)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert [row.name for row in page.items] == ['Venue 2', 'Venue 3']
+
+        statement, parameters = statements[-1]
+        plan = ' '.join(row[-1] for row in db.session.connection().exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', parameters))
+        assert 'SEARCH venue USING INDEX ix_venue_city_state_name_id ((city,state,name)>' in plan
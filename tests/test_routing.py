@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine, insert
+
+from app import create_app
+from models import db, Venue
+from search import rebuild_indexes
+from bookings import rebuild_booking_indexes
+
+
+def _add_venue(engine, name):
+    with engine.begin() as connection:
+        connection.execute(insert(Venue), [{'name': name, 'city': 'San Francisco', 'state': 'CA'}])
+
+
+def _replicated_app(tmp_path, replica_uri):
+    # an app on a primary sqlite database whose venue 1 is named apart from
+    # the one of the replica, so each response tells which database it read
+    app = create_app(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/primary.db', SECRET_KEY='test',
+                     SQLALCHEMY_REPLICA_URIS=[replica_uri], CACHE_TYPE='null', TEMPLATE_PRELOAD=False,
+                     QUERY_PROFILE_SAMPLE_RATE=0, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        _add_venue(db.engine, 'The Primary Hop')
+    rebuild_indexes()
+    rebuild_booking_indexes()
+    return app
+
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    replica_uri = f'sqlite:///{tmp_path}/replica.db'
+    replica = create_engine(replica_uri)
+    db.metadata.create_all(replica)
+    _add_venue(replica, 'The Replica Hop')
+    replica.dispose()
+    return _replicated_app(tmp_path, replica_uri)
+
+
+def _venue_name(client):
+    return client.get('/api/v1/venues/1').json['name']
+
+
+def test_read_only_views_read_from_the_replica(replicated):
+    assert _venue_name(replicated.test_client()) == 'The Replica Hop'
+
+
+def test_clients_read_from_the_primary_after_a_write(replicated):
+    client = replicated.test_client()
+    assert _venue_name(client) == 'The Replica Hop'
+    response = client.post('/venues/create', data={'name': 'The Dueling Pianos Bar', 'city': 'New York', 'state': 'NY',
+                                                   'address': '335 Delancey Street', 'genres': ['Jazz']})
+    assert 'was successfully listed' in response.text
+    assert _venue_name(client) == 'The Primary Hop'
+    # other clients still read from the replica
+    assert _venue_name(replicated.test_client()) == 'The Replica Hop'
+
+    # and the client itself once its stickiness expired
+    replicated.config['REPLICA_STICKY_SECONDS'] = -1
+    client.post('/venues/create', data={'name': 'Park Square Live Music', 'city': 'San Francisco', 'state': 'CA',
+                                        'address': '34 Whiskey Moore Ave', 'genres': ['Folk']})
+    assert _venue_name(client) == 'The Replica Hop'
+
+
+def test_unreachable_replica_falls_back_to_the_primary(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = _replicated_app(tmp_path, f'sqlite:///{tmp_path}/missing/replica.db')
+    client = app.test_client()
+    assert _venue_name(client) == 'The Primary Hop'
+    assert app.extensions['replicas'].replicas[0].healthy is False
@@ -0,0 +1,66 @@
+from models import db, Venue
+from search import search_venues_by_name
+
+
+def _names(rows):
+    return [row.name for row in rows]
+
+
+def test_search_by_partial_name(app):
+    with app.app_context():
+        db.session.add_all([Venue(name='The Musical Hop', city='San Francisco', state='CA'),
+                            Venue(name='Park Square Live Music & Coffee', city='San Francisco', state='CA'),
+                            Venue(name='The Dueling Pianos Bar', city='New York', state='NY')])
+        db.session.commit()
+        assert _names(search_venues_by_name('Hop')) == ['The Musical Hop']
+        assert _names(search_venues_by_name('music')) == ['The Musical Hop', 'Park Square Live Music & Coffee']
+        assert _names(search_venues_by_name('100%')) == []
+
+
+def test_renamed_venue_is_found_after_commit(app):
+    with app.app_context():
+        venue = Venue(name='The Musical Hop', city='San Francisco', state='CA')
+        db.session.add(venue)
+        db.session.commit()
+        assert _names(search_venues_by_name('hop')) == ['The Musical Hop']
+        venue.name = 'The Dueling Pianos Bar'
+        db.session.commit()
+        assert _names(search_venues_by_name('hop')) == []
+        assert _names(search_venues_by_name('piano')) == ['The Dueling Pianos Bar']
+
+
+def test_rolled_back_rename_while_another_session_commits(app):
+    with app.app_context():
+        venue = Venue(name='The Musical Hop', city='San Francisco', state='CA')
+        db.session.add(venue)
+        db.session.commit()
+        search_venues_by_name('hop')
+
+        venue.name = 'The Dueling Pianos Bar'
+        db.session.flush()
+        # another request commits while the rename is still uncommitted
+        with app.app_context():
+            db.session.get(Venue, venue.id)
+            db.session.commit()
+        db.session.rollback()
+
+    with app.app_context():
+        assert _names(search_venues_by_name('hop')) == ['The Musical Hop']
+
+
+def test_edit_handlers_rename_in_the_search_index(app, client):
+    venue = {'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA', 'address': '1015 Folsom Street'}
+    artist = {'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA'}
+    client.post('/venues/create', data=venue)
+    client.post('/artists/create', data=artist)
+    # the fallback indexes are loaded before the renames
+    assert 'The Musical Hop' in client.post('/venues/search', data={'search_term': 'hop'}).text
+    assert 'Guns N Petals' in client.post('/artists/search', data={'search_term': 'petals'}).text
+
+    client.post('/venues/1/edit', data={**venue, 'name': 'Dueling Pianos'})
+    client.post('/artists/1/edit', data={**artist, 'name': 'Matt Quevedo'})
+
+    assert 'The Musical Hop' not in client.post('/venues/search', data={'search_term': 'hop'}).text
+    assert 'Dueling Pianos' in client.post('/venues/search', data={'search_term': 'piano'}).text
+    assert 'Guns N Petals' not in client.post('/artists/search', data={'search_term': 'petals'}).text
+    assert 'Matt Quevedo' in client.post('/artists/search', data={'search_term': 'quevedo'}).text
@@ -0,0 +1,34 @@
+from models import db, Venue, Artist
+
+VENUE = {'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA',
+         'address': '1015 Folsom Street', 'phone': '123-123-1234', 'genres': ['Jazz']}
+ARTIST = {'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA', 'genres': ['Rock n Roll']}
+
+
+def _count(app, model):
+    with app.app_context():
+        return db.session.query(model).count()
+
+
+def test_create_venue(app, client):
+    response = client.post('/venues/create', data=VENUE)
+    assert 'Venue The Musical Hop was successfully listed!' in response.text
+    assert _count(app, Venue) == 1
+
+
+def test_create_venue_without_name(app, client):
+    response = client.post('/venues/create', data={**VENUE, 'name': ''})
+    assert response.status_code == 400
+    data = dict(VENUE)
+    del data['name']
+    assert client.post('/venues/create', data=data).status_code == 400
+    assert _count(app, Venue) == 0
+
+
+def test_create_artist_without_city(app, client):
+    data = dict(ARTIST)
+    del data['city']
+    assert client.post('/artists/create', data=data).status_code == 400
+    assert _count(app, Artist) == 0
+    client.post('/artists/create', data=ARTIST)
+    assert _count(app, Artist) == 1
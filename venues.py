@@ -0,0 +1,237 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+
+from models import db, Venue
+from queries import venue_areas, venue_listing_query, VENUE_LISTING_ORDER, \
+    next_venue_show_at, venue_next_show_at, venue_artist_ids, venue_detail, venue_genres, venue_shows
+from serializers import VENUE_FORM_COLUMNS, VENUE_REQUIRED_FIELDS, row_to_dict, split_shows, form_to_columns
+from pagination import paginate_listing, render_listing
+from cache import cache
+from search import search_venues_by_name
+from genres import set_genres
+from areas import enter_area, leave_area, move_venue, rebuild_areas, area_facets
+from database import replica_reads
+
+blueprint = Blueprint('venues', __name__, cli_group=None)
+
+#----------------------------------------------------------------------------#
+# Cache invalidation.
+#----------------------------------------------------------------------------#
+
+def invalidate_venue(venue_id):
+  # the venue page, the listings showing its name and the artists booked there
+  cache.invalidate('venues', 'shows', f'venue:{venue_id}', *[f'artist:{artist_id}' for artist_id in venue_artist_ids(venue_id)])
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@blueprint.route('/venues')
+@replica_reads
+@cache.cached('venues', expires_at=next_venue_show_at)
+def venues():
+  # TODO: replace with real venues data.
+  #       num_shows should be aggregated based on number of upcoming shows per venue.
+
+    # one page of venues grouped by city and state names (areas) together with
+    # their upcoming show counts, read from the venue counters in a single query.
+    # ?genre=, ?state= and ?city= narrow the listing down, the state and city
+    # facets with their venue counts are read from the area index
+    query = venue_listing_query(request.args.get('genre'), request.args.get('state'), request.args.get('city'))
+    page = paginate_listing(query, VENUE_LISTING_ORDER)
+    areas = venue_areas(page.items)
+
+    return render_listing('pages/venues.html', areas=areas, page=page, facets=area_facets())
+
+@blueprint.route('/venues/search', methods=['POST'])
+@replica_reads
+def search_venues():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+
+    # parse search term and use it for a case-insensitive ranked name search
+    search_term = request.form.get('search_term', '')
+    venue_search_result = search_venues_by_name(search_term)
+
+    response = dict()
+    response['count'] = len(venue_search_result)
+    response['data'] = [{
+        'id': venue.id,
+        'name': venue.name,
+        'num_upcoming_shows': venue.upcoming_shows_count
+    } for venue in venue_search_result]
+
+    return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+
+@blueprint.route('/venues/<int:venue_id>')
+@replica_reads
+@cache.cached('venue:{venue_id}', expires_at=venue_next_show_at)
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # TODO: replace with real venue data from the venues table, using venue_id
+
+    # query venues table by input venue_id
+    venue = venue_detail(venue_id)
+    if venue is None:
+        abort(404)
+    return render_venue(venue, venue_genres(venue_id), venue_shows(venue_id))
+
+def render_venue(venue, genres, shows):
+    current_time = datetime.now()
+
+    # find past and upcoming shows of the venue in one pass over the show tiles
+    past_shows, upcoming_shows = split_shows(shows, current_time)
+
+    data = row_to_dict(venue)
+    data['genres'] = genres
+
+    # parse returned data dictionary
+    data['past_shows'] = past_shows
+    data['past_shows_count'] = len(past_shows)
+
+    data['upcoming_shows'] = upcoming_shows
+    data['upcoming_shows_count'] = len(upcoming_shows)
+
+    return render_template('pages/show_venue.html', venue=data)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@blueprint.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  # WTForms is imported by the first form page rather than at startup
+  from forms import VenueForm
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@blueprint.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+
+  # on successful db insert, flash success
+  # flash('Venue ' + request.form['name'] + ' was successfully listed!')
+  # TODO: on unsuccessful db insert, flash an error instead.
+  # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+  # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+
+
+    # parse the entry of the venue table, the required fields are checked
+    # before anything is written so the messages below always have a name
+    data = form_to_columns(request.form, VENUE_FORM_COLUMNS, VENUE_REQUIRED_FIELDS)
+
+    try:
+        data['area_id'] = enter_area(data['city'], data['state'])
+        venue = Venue(**data)
+        db.session.add(venue)
+        db.session.flush()
+        set_genres(Venue, venue.id, request.form.getlist('genres'))
+        db.session.commit()
+        cache.invalidate('venues')
+        flash('Venue ' + data['name'] + ' was successfully listed!')
+
+    except Exception as error:
+        # rollback pending changes on error
+        db.session.rollback()
+        flash('An error occurred. Venue ' + data['name'] + ' could not be listed.')
+
+    finally:
+        # close current session
+        db.session.close()
+
+    return render_template('pages/home.html')
+
+@blueprint.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+  # TODO: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+
+  try:
+    # retrieve entry of the venue table by input venue_id and delete it
+    venue = Venue.query.get(venue_id)
+    leave_area(venue.area_id)
+    db.session.delete(venue)
+    db.session.commit()
+    invalidate_venue(venue_id)
+    flash(f'Venue {venue_id} was successfully deleted.')
+
+  except Exception as error:
+    # rollback pending changes on error
+    db.session.rollback()
+    flash(f'An error occurred. Venue {venue_id} could not be deleted.')
+
+  finally:
+    # close curent session
+    db.session.close()
+
+  return None
+
+'''
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  return None
+'''
+
+#  Update
+#  ----------------------------------------------------------------
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  # populate form with fields from venue with ID <venue_id>
+  from forms import VenueForm
+  form = VenueForm()
+
+  venue = venue_detail(venue_id)
+  if venue is None:
+    abort(404)
+  venue = row_to_dict(venue)
+
+  # TODO: populate form with values from venue with ID <venue_id>
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@blueprint.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+    # update existing record attributes with input values from submitted form
+    venue = form_to_columns(request.form, VENUE_FORM_COLUMNS, VENUE_REQUIRED_FIELDS)
+    record = db.session.get(Venue, venue_id)
+    if record is None:
+        abort(404)
+    try:
+        venue['area_id'] = move_venue(venue_id, venue['city'], venue['state'])
+
+        # changed on the loaded venue rather than with a bulk UPDATE, so the
+        # mapper events (the search index of search.py) see the new name
+        for name, value in venue.items():
+            setattr(record, name, value)
+        record.version = Venue.version + 1
+        set_genres(Venue, venue_id, request.form.getlist('genres'))
+        # commit ORM object changes to database
+        db.session.commit()
+        invalidate_venue(venue_id)
+    except Exception as error:
+        # rollback pending changes on error
+        db.session.rollback()
+
+    finally:
+      # close current session and parse submission message
+      db.session.close()
+
+    return redirect(url_for('.show_venue', venue_id=venue_id))
+
+#  Areas
+#  ----------------------------------------------------------------
+
+@blueprint.cli.command('rebuild-areas')
+def rebuild_areas_command():
+  # recreate the city/state area index of the venues from scratch
+  print(f'{rebuild_areas()} areas')
+  cache.invalidate('venues')
@@ -0,0 +1,12 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+from app import create_app
+
+#----------------------------------------------------------------------------#
+# WSGI application.
+#----------------------------------------------------------------------------#
+
+# serve with a WSGI server, e.g.:
+#   gunicorn wsgi:app --workers 4 --preload
+app = create_app()